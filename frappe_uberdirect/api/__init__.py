@@ -2,8 +2,10 @@
 
 from .delivery import delivery_api_routes
 from .webhook import webhook_api_routes
+from .metrics import metrics_api_routes
 
 api_routes = {
     **delivery_api_routes,
     **webhook_api_routes,
+    **metrics_api_routes,
 }
@@ -3,15 +3,20 @@
 from .create_delivery import create_delivery_api
 from .cancel_delivery import cancel_delivery_api
 from .create_quote import create_quote_api
+from .bulk_create_delivery import bulk_create_delivery_api, bulk_create_delivery_status_api
 
 __all__ = [
     "create_delivery_api",
     "cancel_delivery_api",
     "create_quote_api",
+    "bulk_create_delivery_api",
+    "bulk_create_delivery_status_api",
 ]
 
 delivery_api_routes = {
     "api.deliveries.create": "frappe_uberdirect.api.delivery.create_delivery_api",
     "api.deliveries.cancel": "frappe_uberdirect.api.delivery.cancel_delivery_api",
     "api.deliveries.create_quote": "frappe_uberdirect.api.delivery.create_quote_api",
+    "api.deliveries.bulk_create": "frappe_uberdirect.api.delivery.bulk_create_delivery_api",
+    "api.deliveries.bulk_create_status": "frappe_uberdirect.api.delivery.bulk_create_delivery_status_api",
 }
@@ -0,0 +1,58 @@
+"""API endpoints for creating deliveries in bulk.
+
+This module provides the API endpoints for dispatching many invoices at once
+(catering, pre-orders) and for following the progress of such a batch.
+"""
+
+import frappe
+
+from frappe_uberdirect.uber_integration.job_handlers.bulk_create_delivery import (
+    get_bulk_delivery_status,
+    start_bulk_delivery,
+)
+
+# largest number of invoices accepted in one request
+MAX_BULK_INVOICES = 200
+
+
+@frappe.whitelist(methods=["POST"])
+def bulk_create_delivery_api() -> dict:
+    """Create deliveries for a list of invoices in the background."""
+
+    # get and validate the invoice ids
+    invoice_ids = frappe.parse_json(frappe.form_dict.get("invoice_ids", None) or "[]")
+    if not isinstance(invoice_ids, list) or not invoice_ids:
+        frappe.throw("Invoice IDs are required", exc=frappe.ValidationError)
+
+    invoice_ids = list(dict.fromkeys(str(invoice_id) for invoice_id in invoice_ids))
+    if len(invoice_ids) > MAX_BULK_INVOICES:
+        msg = f"At most {MAX_BULK_INVOICES} invoices can be dispatched at once"
+        frappe.throw(msg=msg, exc=frappe.ValidationError)
+
+    # start the bulk job
+    job_id = start_bulk_delivery(invoice_ids=invoice_ids)
+
+    return {
+        "message": "Bulk delivery creation started",
+        "job_id": job_id,
+    }
+
+
+@frappe.whitelist()
+def bulk_create_delivery_status_api() -> dict:
+    """Get the progress and per-invoice results of a bulk delivery job."""
+
+    # get and validate the job id
+    job_id = frappe.form_dict.get("job_id", None)
+    if not job_id:
+        frappe.throw("Job ID is required")
+
+    status = get_bulk_delivery_status(handle=job_id)
+    if not status:
+        frappe.throw(f"Bulk delivery job {job_id} not found", exc=frappe.DoesNotExistError)
+
+    # only the user who started the job can follow it
+    if status["owner"] != frappe.session.user and "System Manager" not in frappe.get_roles():
+        frappe.throw("Not permitted", exc=frappe.PermissionError)
+
+    return status
@@ -7,6 +7,7 @@ through the Uber Direct integration.
 import frappe
 
 from frappe_uberdirect.uber_integration import cancel_delivery
+from frappe_uberdirect.uber_integration.helper import forget_order_delivery, get_delivery_id
 
 
 @frappe.whitelist()
@@ -25,9 +26,7 @@ def cancel_delivery_api() -> dict:
 
     #  get the delivery id
     order_id = frappe.form_dict.get("order_id")
-    delivery_id = frappe.db.get_value(
-        "ArcPOS Delivery", {"order_no": order_id}, "delivery_id"
-    )
+    delivery_id = get_delivery_id(order_no=order_id)
     if not delivery_id:
         frappe.throw(f"Delivery ID not found for order {order_id}")
 
@@ -39,4 +38,7 @@ def cancel_delivery_api() -> dict:
 
     # cancel delivery
     response = cancel_delivery(delivery_id=delivery_id, payload=payload)
+
+    # a re-dispatch of the order must not resolve to the canceled delivery
+    forget_order_delivery(order_id)
     return response
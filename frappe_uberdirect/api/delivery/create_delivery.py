@@ -19,6 +19,10 @@ def create_delivery_api() -> dict:
 
     delivery_payload = create_delivery_handler(invoice_id=invoice_id, retry=False)
 
+    # Uber Direct is unavailable, the delivery is created once it recovers
+    if delivery_payload is None:
+        return {"message": "Delivery creation deferred", "delivery_payload": None}
+
     return {
         "message": "Delivery created successfully",
         "delivery_payload": delivery_payload,
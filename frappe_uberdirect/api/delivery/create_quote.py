@@ -7,14 +7,22 @@ through the Uber Direct integration.
 import json
 
 import frappe
-from frappe_uberdirect.uber_integration import create_quote
+from werkzeug.wrappers import Response
+
+from frappe_uberdirect.uber_integration import create_quote_cached
+from frappe_uberdirect.uber_integration.circuit_breaker import (
+    UberDirectCircuitOpenError,
+    get_circuit_fallback,
+)
+from frappe_uberdirect.uber_integration.quote_cache import get_fallback_quote
 from frappe_uberdirect.uber_integration.helper.get_pickup_address import (
     get_pickup_address,
 )
+from .helper.admit_quote_request import admit_quote_request
 
 
 @frappe.whitelist(allow_guest=True, methods=["POST"])
-def create_quote_api() -> dict:
+def create_quote_api() -> dict | Response:
     """Create a quote for an order through the Uber Direct integration."""
 
     # dropof address fields
@@ -52,9 +60,35 @@ def create_quote_api() -> dict:
         **opt_dict,
     }
 
-    print(quote_data)
+    # over the rate limit, answer from the cache or ask to retry later
+    admitted, retry_after = admit_quote_request()
+    if not admitted:
+        fallback = get_fallback_quote(payload=quote_data)
+        if not fallback:
+            return _too_many_requests(retry_after)
+        return fallback
 
-    # create the quote
-    result = create_quote(payload=quote_data)
+    # create the quote, reusing a cached quote for the same request
+    try:
+        result = create_quote_cached(payload=quote_data)
+    except UberDirectCircuitOpenError:
+        # Uber Direct is failing, answer from the cache if configured
+        fallback = None
+        if get_circuit_fallback("create_quote") == "cached_quote":
+            fallback = get_fallback_quote(payload=quote_data)
+        if not fallback:
+            raise
+        return fallback
 
     return result
+
+
+def _too_many_requests(retry_after: int) -> Response:
+    """Answer a throttled request with 429 and the seconds to wait in ``Retry-After``."""
+
+    return Response(
+        json.dumps({"message": "Too many quote requests. Please try again shortly."}),
+        status=429,
+        headers={"Retry-After": str(retry_after)},
+        mimetype="application/json",
+    )
@@ -1,11 +1,21 @@
 import frappe
+from frappe.utils import cint
 
 from frappe_uberdirect.uber_integration import get_delivery
+from frappe_uberdirect.uber_integration.delivery_snapshot import (
+    get_delivery_snapshot,
+    update_delivery_snapshot,
+)
+from frappe_uberdirect.uber_integration.helper import get_delivery_id
 
 
 @frappe.whitelist()
 def get_delivery_api() -> dict:
-    """Get a delivery."""
+    """Get a delivery.
+
+    Serves the latest delivery object kept from the webhooks, in the same
+    shape as Uber's; pass ``live=1`` to ask Uber Direct instead.
+    """
 
     # get and validate order id
     order_id = frappe.form_dict.get("order_id", None)
@@ -13,12 +23,24 @@ def get_delivery_api() -> dict:
         frappe.throw("Order ID is required")
 
     # get delivery id
-    delivery_id = frappe.db.get_value(
-        "ArcPOS Delivery", {"order_no": order_id}, "delivery_id"
-    )
+    delivery_id = get_delivery_id(order_no=order_id)
     if not delivery_id:
         frappe.throw(f"Delivery ID not found for order {order_id}")
 
-    # get delivery
+    # serve the snapshot kept from the webhooks
+    if not cint(frappe.form_dict.get("live", 0)):
+        snapshot = get_delivery_snapshot(delivery_id)
+        if snapshot and snapshot.get("status"):
+            return snapshot
+
+    # get delivery, and keep it as the snapshot
     delivery = get_delivery(delivery_id=delivery_id)
+    update_delivery_snapshot(
+        delivery_id,
+        order_id,
+        delivery=delivery,
+        status=delivery.get("status"),
+        courier=delivery.get("courier"),
+        publish=False,
+    )
     return delivery
@@ -0,0 +1,51 @@
+"""Admission control for the guest quote endpoint."""
+
+import frappe
+from frappe_uberdirect.utils.metrics import increment
+from frappe_uberdirect.utils.rate_limit import consume_tokens
+
+# token bucket limits per scope, rate in requests per second
+DEFAULT_QUOTE_RATE_LIMITS = {
+    "ip": {"rate": 0.2, "burst": 10},
+    "session": {"rate": 0.2, "burst": 10},
+    "global": {"rate": 10, "burst": 50},
+}
+
+
+def admit_quote_request() -> tuple[bool, int]:
+    """Check the quote request against the per IP, per session and global limits.
+
+    Limits can be overridden (or a scope disabled with ``null``) in the site config:
+
+        "uberdirect_quote_rate_limits": {"ip": {"rate": 1, "burst": 20}, "session": null}
+
+    Returns:
+        tuple[bool, int]: Whether the request is admitted, and if not, the
+            seconds until it can be retried
+    """
+    limits = {**DEFAULT_QUOTE_RATE_LIMITS, **(frappe.conf.get("uberdirect_quote_rate_limits") or {})}
+
+    identifiers = {"ip": frappe.local.request_ip, "global": "all"}
+    if frappe.session.user != "Guest":
+        identifiers["session"] = frappe.session.sid
+
+    buckets = [
+        (scope, identifier, limits[scope])
+        for scope, identifier in identifiers.items()
+        if identifier and limits.get(scope)
+    ]
+
+    try:
+        exhausted = consume_tokens("create_quote", buckets)
+    except Exception as e:
+        # fail open, the quote endpoint must not depend on the limiter
+        frappe.logger(module="frappe_uberdirect").error(f"Quote admission check failed: {e!s}")
+        return True, 0
+
+    if exhausted:
+        exhausted_scope, retry_after = exhausted
+        increment("quote_admission", result="throttled", scope=exhausted_scope)
+        return False, retry_after
+
+    increment("quote_admission", result="admitted")
+    return True, 0
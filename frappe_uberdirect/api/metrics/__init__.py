@@ -0,0 +1,12 @@
+from .prometheus_metrics import prometheus_metrics_api
+
+
+__all__ = [
+    "prometheus_metrics_api",
+]
+
+
+# metrics api routes
+metrics_api_routes = {
+    "api.metrics": "frappe_uberdirect.api.metrics.prometheus_metrics_api",
+}
@@ -0,0 +1,38 @@
+"""API endpoint exposing the integration metrics to Prometheus.
+
+Scrapers authenticate with the ``uberdirect_metrics_token`` from the site
+configuration in the ``X-Uberdirect-Metrics-Token`` header; System Managers
+can read it while logged in. The token cannot go in ``Authorization``:
+Frappe reads any two-part value there as its own API key or OAuth
+credentials and rejects the request before it reaches the endpoint.
+"""
+
+import hmac
+
+import frappe
+from werkzeug.wrappers import Response
+
+from frappe_uberdirect.utils.prometheus import render_metrics
+
+TOKEN_HEADER = "X-Uberdirect-Metrics-Token"
+
+
+@frappe.whitelist(allow_guest=True, methods=["GET"])
+def prometheus_metrics_api() -> Response:
+    """Get the metrics in the Prometheus text format."""
+
+    if not _is_authorized():
+        frappe.throw("Not permitted to read the metrics", exc=frappe.PermissionError)
+
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+def _is_authorized() -> bool:
+    """Check the scrape token, or fall back to the System Manager role."""
+
+    token = frappe.conf.get("uberdirect_metrics_token")
+    scrape_token = frappe.get_request_header(TOKEN_HEADER) or ""
+    if token and scrape_token:
+        return hmac.compare_digest(scrape_token.encode(), token.encode())
+
+    return "System Manager" in frappe.get_roles()
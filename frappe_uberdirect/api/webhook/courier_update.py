@@ -4,6 +4,8 @@ import frappe
 from .helper.uber_webhook import verify_uber_webhook
 from frappe_uberdirect.uber_integration.event_handlers import courier_update_handler
 from .helper.get_webhook_secret import get_webhook_secret
+from .helper.dispatch_webhook import dispatch_webhook
+from .helper.dedupe_webhook import is_duplicate_webhook
 
 
 @frappe.whitelist(allow_guest=True, methods=["POST"])
@@ -14,11 +16,15 @@ def courier_update_webhook() -> dict:
     secret = get_webhook_secret(kind="courier_update")
     verify_uber_webhook(secret=secret)
 
+    # drop redeliveries of an event that was already received
+    if is_duplicate_webhook(kind="courier_update"):
+        return {"message": "Webhook received successfully"}
+
     # Convert frappe.form_dict to regular dict for background job serialization
     payload = dict(frappe.form_dict)
 
-    # enqueue the background job
-    frappe.enqueue(courier_update_handler, queue="short", payload=payload)
+    # hand the event over to the background handler
+    dispatch_webhook(kind="courier_update", handler=courier_update_handler, payload=payload)
 
     # return response
     return {"message": "Webhook received successfully"}
@@ -4,6 +4,8 @@ import frappe
 from .helper.uber_webhook import verify_uber_webhook
 from frappe_uberdirect.uber_integration.event_handlers import delivery_status_handler
 from .helper.get_webhook_secret import get_webhook_secret
+from .helper.dispatch_webhook import dispatch_webhook
+from .helper.dedupe_webhook import is_duplicate_webhook
 
 
 @frappe.whitelist(allow_guest=True, methods=["POST"])
@@ -16,11 +18,15 @@ def delivery_status_webhook() -> dict:
     secret = get_webhook_secret(kind="delivery_status")
     verify_uber_webhook(secret=secret)
 
+    # drop redeliveries of an event that was already received
+    if is_duplicate_webhook(kind="delivery_status"):
+        return {"message": "Webhook received successfully"}
+
     # Convert frappe.form_dict to regular dict for background job serialization
     payload = dict(frappe.form_dict)
 
-    # enqueue the background job
-    frappe.enqueue(delivery_status_handler, queue="short", payload=payload)
+    # hand the event over to the background handler
+    dispatch_webhook(kind="delivery_status", handler=delivery_status_handler, payload=payload)
 
     # return response
     return {"message": "Webhook received successfully"}
@@ -0,0 +1,49 @@
+"""Helper to drop Uber webhook redeliveries before they are enqueued."""
+
+import hashlib
+
+import frappe
+from frappe_uberdirect.utils.metrics import increment
+
+# how long a seen event is remembered, in seconds
+DEFAULT_SEEN_TTL = 24 * 60 * 60
+
+
+def get_webhook_event_id() -> str:
+    """Get the ID of the current webhook event, or a hash of the raw body."""
+
+    event_id = frappe.form_dict.get("event_id") or frappe.form_dict.get("id")
+    if not event_id:
+        raw_body = frappe.request.data
+        if isinstance(raw_body, str):
+            raw_body = raw_body.encode("utf-8")
+        event_id = hashlib.sha256(raw_body or b"").hexdigest()
+
+    return event_id
+
+
+def _prepare_seen_key(kind: str, event_id: str | None = None) -> str:
+    """Prepare the seen-event key of a webhook event, the current one by default."""
+    return frappe.cache().make_key(f"uberdirect_webhook_seen:{kind}:{event_id or get_webhook_event_id()}")
+
+
+def is_duplicate_webhook(kind: str) -> bool:
+    """Record the current webhook event and check if it was already seen."""
+
+    ttl = int(frappe.conf.get("uberdirect_webhook_seen_ttl") or DEFAULT_SEEN_TTL)
+    is_first = frappe.cache().set(_prepare_seen_key(kind), 1, nx=True, ex=ttl)
+    if is_first:
+        return False
+
+    increment("webhook_duplicates", kind=kind)
+    return True
+
+
+def forget_webhook(kind: str) -> None:
+    """Forget the current webhook event so Uber's retry is processed."""
+    frappe.cache().delete(_prepare_seen_key(kind))
+
+
+def forget_webhook_event(kind: str, event_id: str) -> None:
+    """Forget a webhook event by ID outside its request, e.g. when a background handler gave up on it."""
+    frappe.cache().delete(_prepare_seen_key(kind, event_id))
@@ -0,0 +1,49 @@
+"""Helper to hand a verified webhook payload over to its background handler."""
+
+import time
+from typing import Callable
+
+import frappe
+from frappe_uberdirect.uber_integration.event_handlers.coalesce_events import (
+    coalesce_event,
+    is_coalescing_enabled,
+)
+from frappe_uberdirect.uber_integration.event_handlers.stream_events import (
+    is_stream_ingestion_enabled,
+    publish_event,
+)
+
+from .dedupe_webhook import forget_webhook, get_webhook_event_id
+
+
+def dispatch_webhook(kind: str, handler: Callable, payload: dict) -> None:
+    """Append the event to its stream, coalesce it with pending events of the same delivery, or enqueue it.
+
+    The receipt time is stamped on the payload as ``_received_at`` so the
+    handler can record the receive-to-apply lag, and the event ID as
+    ``_event_id`` so a handler that gives up on the event can forget it.
+    """
+    payload = {**payload, "_received_at": time.time(), "_event_id": get_webhook_event_id()}
+
+    try:
+        # ordered ingestion through the delivery's stream partition
+        if is_stream_ingestion_enabled(kind):
+            publish_event(kind, payload)
+            return
+
+        # coalesce bursts of events for the same delivery
+        if is_coalescing_enabled(kind) and coalesce_event(kind, payload):
+            return
+
+        # enqueue the background job, once per event
+        frappe.enqueue(
+            handler,
+            queue="short",
+            job_id=f"webhook_{kind}_{get_webhook_event_id()}",
+            deduplicate=True,
+            payload=payload,
+        )
+    except Exception:
+        # the event was not handed over, let Uber's retry through
+        forget_webhook(kind)
+        raise
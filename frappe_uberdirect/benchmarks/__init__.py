@@ -0,0 +1 @@
+"""Benchmarks for the Uber Direct integration."""
@@ -0,0 +1,79 @@
+"""Benchmark pooled vs unpooled latency of the Uber Direct HTTP client.
+
+Starts the local Uber Direct stub server and sends the same quote request
+through plain ``requests.post`` (a new connection per call) and through the pooled
+``UberDirectClient``.
+
+Usage:
+    python -m frappe_uberdirect.benchmarks.http_client --requests 500
+    python -m frappe_uberdirect.benchmarks.http_client --certfile cert.pem --keyfile key.pem
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import requests
+
+from frappe_uberdirect.uber_integration.client import UberDirectClient
+
+from .stub_server import start_stub_server
+
+
+def _measure(send, count: int) -> list[float]:
+    """Send ``count`` requests and return the latency of each one in milliseconds."""
+
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = send()
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def _summary(latencies: list[float]) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 3),
+    }
+
+
+def run(requests_count: int = 200, certfile: str = None, keyfile: str = None) -> dict:
+    """Run the benchmark and return the latency summary for both modes."""
+
+    server, base_url = start_stub_server(certfile=certfile, keyfile=keyfile)
+    url = f"{base_url}/v1/customers/benchmark/delivery_quotes"
+    payload = {"pickup_address": "{}", "dropoff_address": "{}"}
+    verify = not certfile
+
+    try:
+        unpooled = _measure(
+            lambda: requests.post(url, json=payload, timeout=10, verify=verify),
+            requests_count,
+        )
+
+        client = UberDirectClient(pool_size=1, circuit_breaker=False, instrument=False)
+        client.session.verify = verify
+        pooled = _measure(
+            lambda: client.post("create_quote", url, json=payload),
+            requests_count,
+        )
+        client.close()
+    finally:
+        server.shutdown()
+
+    return {"requests": requests_count, "unpooled": _summary(unpooled), "pooled": _summary(pooled)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--certfile", default=None)
+    parser.add_argument("--keyfile", default=None)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.requests, args.certfile, args.keyfile), indent=2))
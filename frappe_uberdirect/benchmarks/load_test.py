@@ -0,0 +1,250 @@
+"""End-to-end load test of the Uber Direct integration.
+
+Drives a running site, usually pointed at the local stub server
+(``frappe_uberdirect.benchmarks.stub_server``), with an open-loop load:
+requests are sent on a fixed schedule at the target rate whether or not the
+previous ones have answered, so a slow site shows up as latency instead of a
+lower send rate.
+
+Scenarios:
+    webhook   signed delivery_status and courier_update webhooks
+    quote     create_quote with a dropoff address
+    create    create_delivery for the invoices passed with --invoices
+
+Reports p50, p95 and p99 latency, the error count and the throughput of each
+scenario.
+
+Usage:
+    python -m frappe_uberdirect.benchmarks.load_test --site-url http://site.localhost:8000 \\
+        --scenario webhook --rps 50 --duration 60 --webhook-secret delivery_status=... \\
+        --webhook-secret courier_update=... --delivery-ids del_1,del_2
+    python -m frappe_uberdirect.benchmarks.load_test --site-url http://site.localhost:8000 \\
+        --scenario quote --scenario create --rps 10 --token <api_key>:<api_secret> --invoices ACC-SINV-0001,ACC-SINV-0002
+"""
+
+import argparse
+import hashlib
+import hmac
+import itertools
+import json
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+WEBHOOK_PATHS = {
+    "delivery_status": "/api/method/api.webhook.delivery_status",
+    "courier_update": "/api/method/api.webhook.courier_update",
+}
+QUOTE_PATH = "/api/method/api.deliveries.create_quote"
+CREATE_PATH = "/api/method/api.deliveries.create"
+
+DELIVERY_STATUSES = ["pending", "pickup", "pickup_complete", "dropoff", "delivered"]
+
+DROPOFF_ADDRESS = {
+    "street_address": "425 Market St",
+    "city": "San Francisco",
+    "state": "CA",
+    "zip_code": "94105",
+    "country": "US",
+}
+
+
+class LoadTest:
+    """Send requests at a target rate and collect their latencies."""
+
+    def __init__(self, site_url: str, token: str = None, webhook_secrets: dict = None, workers: int = 32):
+        self.site_url = site_url.rstrip("/")
+        self.webhook_secrets = webhook_secrets or {}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if token:
+            self.session.headers["Authorization"] = f"token {token}"
+
+        self.workers = workers
+        self.lock = threading.Lock()
+
+    def run(self, send, rps: float, duration: float) -> dict:
+        """Call ``send`` ``rps`` times per second for ``duration`` seconds.
+
+        Returns:
+            dict: The latency percentiles, error count and throughput
+        """
+        results = []
+        total = int(rps * duration)
+        interval = 1 / rps
+
+        def timed(sequence: int, scheduled: float) -> None:
+            try:
+                response = send(sequence)
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            # from the scheduled time, so queueing for a worker is not hidden
+            latency = (time.perf_counter() - scheduled) * 1000
+            with self.lock:
+                results.append((latency, ok))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for sequence in range(total):
+                # open loop, keep the schedule even when responses are slow
+                scheduled = started + sequence * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(timed, sequence, scheduled)
+        elapsed = time.perf_counter() - started
+
+        return _summary(results, elapsed, rps)
+
+    # scenarios
+
+    def send_webhook(self, kind: str, delivery_ids: list[str]):
+        """Get a sender of signed webhooks of ``kind`` cycling over ``delivery_ids``."""
+
+        secret = self.webhook_secrets.get(kind)
+        if not secret:
+            raise SystemExit(f"--webhook-secret {kind}=<secret> is required for the webhook scenario")
+
+        ids = itertools.cycle(delivery_ids or [f"del_loadtest_{index}" for index in range(100)])
+        url = f"{self.site_url}{WEBHOOK_PATHS[kind]}"
+
+        def send(sequence: int) -> requests.Response:
+            body = json.dumps(_webhook_payload(kind, next(ids), sequence)).encode()
+            signature = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+            headers = {"Content-Type": "application/json", "X-Uber-Signature": signature}
+            return self.session.post(url, data=body, headers=headers, timeout=30)
+
+        return send
+
+    def send_quote(self):
+        url = f"{self.site_url}{QUOTE_PATH}"
+
+        def send(sequence: int) -> requests.Response:
+            # vary the value so some requests miss the quote cache
+            payload = {**DROPOFF_ADDRESS, "manifest_total_value": 1000 + (sequence % 20) * 1000}
+            return self.session.post(url, json=payload, timeout=30)
+
+        return send
+
+    def send_create(self, invoices: list[str]):
+        if not invoices:
+            raise SystemExit("--invoices is required for the create scenario")
+
+        ids = itertools.cycle(invoices)
+        url = f"{self.site_url}{CREATE_PATH}"
+
+        def send(sequence: int) -> requests.Response:
+            return self.session.post(url, json={"invoice_id": next(ids)}, timeout=60)
+
+        return send
+
+
+def _webhook_payload(kind: str, delivery_id: str, sequence: int) -> dict:
+    """Build a webhook body like the ones Uber sends."""
+
+    payload = {
+        "id": f"evt_{uuid.uuid4().hex}",
+        "kind": f"event.{kind}",
+        "delivery_id": delivery_id,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "live_mode": False,
+    }
+    if kind == "delivery_status":
+        payload["status"] = DELIVERY_STATUSES[sequence % len(DELIVERY_STATUSES)]
+    else:
+        payload["data"] = {
+            "courier": {
+                "name": "Load Test Courier",
+                "phone_number": "+15555550100",
+                "rating": 4.9,
+                "vehicle_type": "car",
+                "img_href": None,
+                "location": {"lat": 37.79 + sequence % 100 / 10000, "lng": -122.39},
+            }
+        }
+    return payload
+
+
+def _percentile(ordered: list[float], percentile: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percentile))]
+
+
+def _summary(results: list[tuple[float, bool]], elapsed: float, rps: float) -> dict:
+    latencies = sorted(latency for latency, _ in results)
+    if not latencies:
+        return {"requests": 0}
+
+    return {
+        "requests": len(results),
+        "errors": sum(1 for _, ok in results if not ok),
+        "target_rps": rps,
+        "throughput_rps": round(len(results) / elapsed, 2),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(_percentile(latencies, 0.50), 3),
+        "p95_ms": round(_percentile(latencies, 0.95), 3),
+        "p99_ms": round(_percentile(latencies, 0.99), 3),
+    }
+
+
+def run(
+    site_url: str,
+    scenarios: list[str],
+    rps: float = 10,
+    duration: float = 30,
+    token: str = None,
+    webhook_secrets: dict = None,
+    delivery_ids: list[str] = None,
+    invoices: list[str] = None,
+    workers: int = 32,
+) -> dict:
+    """Run each scenario in turn and return its summary."""
+
+    load_test = LoadTest(site_url, token=token, webhook_secrets=webhook_secrets, workers=workers)
+
+    senders = {}
+    for scenario in scenarios:
+        if scenario == "webhook":
+            for kind in WEBHOOK_PATHS:
+                senders[kind] = load_test.send_webhook(kind, delivery_ids)
+        elif scenario == "quote":
+            senders["quote"] = load_test.send_quote()
+        elif scenario == "create":
+            senders["create"] = load_test.send_create(invoices)
+
+    return {name: load_test.run(send, rps, duration) for name, send in senders.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--site-url", required=True)
+    parser.add_argument("--scenario", action="append", choices=["webhook", "quote", "create"], required=True)
+    parser.add_argument("--rps", type=float, default=10)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--token", default=None, help="<api_key>:<api_secret> of the user creating deliveries")
+    parser.add_argument("--webhook-secret", action="append", default=[], help="<kind>=<secret>")
+    parser.add_argument("--delivery-ids", default="", help="Comma separated delivery IDs targeted by webhooks")
+    parser.add_argument("--invoices", default="", help="Comma separated invoices to create deliveries for")
+    args = parser.parse_args()
+
+    summary = run(
+        site_url=args.site_url,
+        scenarios=args.scenario,
+        rps=args.rps,
+        duration=args.duration,
+        token=args.token,
+        webhook_secrets=dict(secret.split("=", 1) for secret in args.webhook_secret),
+        delivery_ids=[value for value in args.delivery_ids.split(",") if value],
+        invoices=[value for value in args.invoices.split(",") if value],
+        workers=args.workers,
+    )
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,110 @@
+"""Benchmark scheduled job promotion as the registry grows.
+
+Fills a throwaway queue's scheduled registry with ``size`` jobs, a fraction
+of them already due, and times the old per-job promotion loop against
+``promote_due_jobs``.
+
+Usage:
+    bench --site <site> execute frappe_uberdirect.benchmarks.scheduler.run
+    bench --site <site> execute frappe_uberdirect.benchmarks.scheduler.run --kwargs "{'sizes': [1000, 50000]}"
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import frappe
+from frappe.utils.background_jobs import get_redis_conn
+from rq import Queue
+from rq.registry import ScheduledJobRegistry
+
+from frappe_uberdirect.utils.scheduler import promote_due_jobs
+
+BENCHMARK_QUEUE = "uberdirect_benchmark_scheduler"
+
+
+def _fill_registry(queue: Queue, size: int, due_ratio: float) -> list[str]:
+    """Schedule ``size`` jobs, ``due_ratio`` of them in the past, and return their keys."""
+
+    now = datetime.now(timezone.utc)
+    due_count = int(size * due_ratio)
+    job_keys = []
+
+    with queue.connection.pipeline() as pipe:
+        for index in range(size):
+            offset = timedelta(minutes=-5) if index < due_count else timedelta(hours=1)
+            job = queue.create_job("frappe.ping")
+            queue.schedule_job(job, now + offset, pipeline=pipe)
+            job_keys.append(job.key)
+        pipe.execute()
+
+    return job_keys
+
+
+def _reset(queue: Queue, job_keys: list[str]) -> None:
+    """Remove the benchmark jobs, the queue and its scheduled registry."""
+
+    registry = ScheduledJobRegistry(queue=queue, connection=queue.connection)
+    queue.empty()
+    queue.connection.delete(registry.key)
+    for index in range(0, len(job_keys), 1000):
+        queue.connection.delete(*job_keys[index : index + 1000])
+
+
+def _promote_per_job(queue: Queue, redis_conn) -> int:
+    """The previous promotion loop: one zscore/fetch/remove/enqueue per job."""
+
+    registry = ScheduledJobRegistry(queue=queue, connection=redis_conn)
+    now = time.time()
+    promoted = 0
+
+    for job_id in registry.get_job_ids():
+        scheduled_timestamp = redis_conn.zscore(registry.key, job_id)
+        if scheduled_timestamp is None or scheduled_timestamp <= now:
+            job = queue.job_class.fetch(job_id, connection=redis_conn)
+            registry.remove(job_id)
+            queue.enqueue_job(job)
+            promoted += 1
+
+    return promoted
+
+
+def _time(func, *args) -> tuple[float, int]:
+    start = time.perf_counter()
+    promoted = func(*args)
+    return (time.perf_counter() - start) * 1000, promoted
+
+
+def run(sizes: list[int] | None = None, due_ratio: float = 0.1) -> list[dict]:
+    """Run the benchmark for each registry size and return the timings."""
+
+    redis_conn = get_redis_conn()
+    queue = Queue(BENCHMARK_QUEUE, connection=redis_conn)
+    results = []
+
+    try:
+        for size in sizes or [100, 1000, 10000]:
+            job_keys = _fill_registry(queue, size, due_ratio)
+            per_job_ms, per_job_count = _time(_promote_per_job, queue, redis_conn)
+            _reset(queue, job_keys)
+
+            job_keys = _fill_registry(queue, size, due_ratio)
+            bulk_ms, bulk_promoted = _time(lambda: len(promote_due_jobs(queue, redis_conn=redis_conn)))
+            _reset(queue, job_keys)
+
+            results.append(
+                {
+                    "registry_size": size,
+                    "due_jobs": per_job_count,
+                    "per_job_ms": round(per_job_ms, 2),
+                    "bulk_ms": round(bulk_ms, 2),
+                    "bulk_promoted": bulk_promoted,
+                }
+            )
+    finally:
+        queue.delete(delete_jobs=True)
+
+    for row in results:
+        frappe.logger().info(f"Scheduler promotion benchmark: {row}")
+        print(row)
+
+    return results
@@ -0,0 +1,61 @@
+"""Benchmark the sales invoice update of a delivery status event.
+
+Applies a delivery status to an existing invoice through the full document
+save and through the targeted field writes, counting queries and time for
+each. All changes are rolled back.
+
+Usage:
+    bench --site <site> execute frappe_uberdirect.benchmarks.status_update.run --kwargs "{'invoice_id': 'ACC-SINV-2026-00001'}"
+"""
+
+import time
+
+import frappe
+
+from frappe_uberdirect.uber_integration.event_handlers.delivery_status_handler import (
+    save_invoice_status,
+    set_invoice_status,
+)
+
+
+def _measure(apply, invoice_id: str, delivery_status: str, iterations: int) -> dict:
+    """Apply the status ``iterations`` times and return the mean time and query count."""
+
+    sql = frappe.db.sql
+    queries = 0
+
+    def counting_sql(*args, **kwargs):
+        nonlocal queries
+        queries += 1
+        return sql(*args, **kwargs)
+
+    elapsed = 0.0
+    frappe.db.sql = counting_sql
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            apply(invoice_id, delivery_status)
+            elapsed += time.perf_counter() - start
+            frappe.db.rollback()
+    finally:
+        frappe.db.sql = sql
+
+    return {
+        "mean_ms": round(elapsed / iterations * 1000, 2),
+        "queries_per_update": round(queries / iterations, 1),
+    }
+
+
+def run(invoice_id: str, delivery_status: str = "delivered", iterations: int = 10) -> dict:
+    """Run the benchmark against ``invoice_id`` and return both measurements."""
+
+    results = {
+        "invoice_id": invoice_id,
+        "delivery_status": delivery_status,
+        "full_save": _measure(save_invoice_status, invoice_id, delivery_status, iterations),
+        "targeted_writes": _measure(set_invoice_status, invoice_id, delivery_status, iterations),
+    }
+
+    frappe.db.rollback()
+    print(results)
+    return results
@@ -0,0 +1,309 @@
+"""Local stand-in for the Uber Direct API.
+
+Implements the endpoints used by ``uber_integration``: the OAuth token,
+delivery quotes, deliveries (create, get, list, update), cancel and proof of
+delivery. Deliveries are kept in memory. Every response can be delayed and a
+fraction of requests can fail, so the integration can be load tested without
+the Uber sandbox.
+
+Point a site at it with:
+
+    "uberdirect_api_url": "http://127.0.0.1:8090/v1",
+    "uberdirect_oauth_url": "http://127.0.0.1:8090"
+
+Usage:
+    python -m frappe_uberdirect.benchmarks.stub_server --port 8090
+    python -m frappe_uberdirect.benchmarks.stub_server --port 8090 --latency-ms 150 --jitter-ms 50 --error-rate 0.02
+"""
+
+import argparse
+import json
+import random
+import re
+import ssl
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# token lifetime returned by the OAuth endpoint, in seconds
+TOKEN_EXPIRES_IN = 30 * 24 * 60 * 60
+
+# quote lifetime, in minutes
+QUOTE_EXPIRES_MINUTES = 15
+
+ROUTES = [
+    ("POST", re.compile(r"^/oauth/v2/token$"), "oauth_token"),
+    ("POST", re.compile(r"^/customers/[^/]+/delivery_quotes$"), "create_quote"),
+    ("POST", re.compile(r"^/customers/[^/]+/deliveries$"), "create_delivery"),
+    ("GET", re.compile(r"^/customers/[^/]+/deliveries$"), "list_deliveries"),
+    ("GET", re.compile(r"^/customers/[^/]+/deliveries/(?P<delivery_id>[^/]+)$"), "get_delivery"),
+    ("POST", re.compile(r"^/customers/[^/]+/deliveries/(?P<delivery_id>[^/]+)$"), "update_delivery"),
+    ("PUT", re.compile(r"^/customers/[^/]+/deliveries/(?P<delivery_id>[^/]+)$"), "update_delivery"),
+    ("POST", re.compile(r"^/customers/[^/]+/deliveries/(?P<delivery_id>[^/]+)/cancel$"), "cancel_delivery"),
+    (
+        "POST",
+        re.compile(r"^/customers/[^/]+/deliveries/(?P<delivery_id>[^/]+)/proof_of_delivery$"),
+        "proof_of_delivery",
+    ),
+]
+
+
+class StubState:
+    """Behaviour and in-memory data of a stub server."""
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0.0, error_status: int = 500):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+        self.deliveries = {}
+        self.requests = {}
+        self.lock = threading.Lock()
+
+    def count(self, endpoint: str) -> None:
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Route requests to the stubbed endpoints over keep-alive connections."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self) -> StubState:
+        return self.server.state
+
+    def _handle(self, method: str) -> None:
+        url = urlsplit(self.path)
+        path = re.sub(r"^/v1(?=/)", "", url.path)
+        body = self._read_body()
+
+        for route_method, pattern, endpoint in ROUTES:
+            match = pattern.match(path)
+            if route_method == method and match:
+                break
+        else:
+            return self._send(404, {"code": "not_found", "message": f"No route for {method} {url.path}"})
+
+        self.state.count(endpoint)
+
+        # injected latency and errors
+        delay = self.state.latency_ms + random.uniform(-self.state.jitter_ms, self.state.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if self.state.error_rate and random.random() < self.state.error_rate:
+            return self._send(self.state.error_status, {"code": "injected_error", "message": "Injected error"})
+
+        params = dict(parse_qsl(url.query))
+        status, response = getattr(self, f"_{endpoint}")(body=body, params=params, **match.groupdict())
+        self._send(status, response)
+
+    def _read_body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if not raw:
+            return {}
+
+        if "application/x-www-form-urlencoded" in (self.headers.get("Content-Type") or ""):
+            return dict(parse_qsl(raw.decode()))
+
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return {}
+
+    def _send(self, status: int, response: dict) -> None:
+        data = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    # endpoints
+
+    def _oauth_token(self, body: dict, params: dict) -> tuple[int, dict]:
+        token = {
+            "access_token": f"stub_{uuid.uuid4().hex}",
+            "token_type": "Bearer",
+            "expires_in": TOKEN_EXPIRES_IN,
+            "scope": body.get("scope", "eats.deliveries"),
+        }
+        return 200, token
+
+    def _create_quote(self, body: dict, params: dict) -> tuple[int, dict]:
+        now = datetime.now(timezone.utc)
+        quote = {
+            "kind": "delivery_quote",
+            "id": f"dqt_{uuid.uuid4().hex}",
+            "created": _format_dt(now),
+            "expires": _format_dt(now + timedelta(minutes=QUOTE_EXPIRES_MINUTES)),
+            "fee": random.randint(400, 1200),
+            "currency": "usd",
+            "currency_type": "USD",
+            "dropoff_eta": _format_dt(now + timedelta(minutes=35)),
+            "duration": 35,
+            "pickup_duration": 10,
+        }
+        return 200, quote
+
+    def _create_delivery(self, body: dict, params: dict) -> tuple[int, dict]:
+        now = datetime.now(timezone.utc)
+        delivery_id = f"del_{uuid.uuid4().hex}"
+        delivery = {
+            "kind": "delivery",
+            "id": delivery_id,
+            "quote_id": body.get("quote_id"),
+            "status": "pending",
+            "complete": False,
+            "created": _format_dt(now),
+            "updated": _format_dt(now),
+            "pickup_eta": _format_dt(now + timedelta(minutes=10)),
+            "dropoff_eta": _format_dt(now + timedelta(minutes=35)),
+            "fee": random.randint(400, 1200),
+            "currency": "usd",
+            "tracking_url": f"https://delivery.uber.com/orders/{delivery_id}",
+            "external_id": body.get("external_id"),
+            "courier": None,
+            "live_mode": False,
+        }
+        with self.state.lock:
+            self.state.deliveries[delivery_id] = delivery
+        return 200, delivery
+
+    def _list_deliveries(self, body: dict, params: dict) -> tuple[int, dict]:
+        limit = int(params.get("limit") or 100)
+        offset = int(params.get("offset") or 0)
+        status_filter = params.get("filter")
+
+        with self.state.lock:
+            deliveries = sorted(self.state.deliveries.values(), key=lambda delivery: delivery["created"], reverse=True)
+        if params.get("start_dt"):
+            deliveries = [delivery for delivery in deliveries if delivery["created"] >= params["start_dt"]]
+        if params.get("end_dt"):
+            deliveries = [delivery for delivery in deliveries if delivery["created"] < params["end_dt"]]
+        if status_filter == "ongoing":
+            deliveries = [delivery for delivery in deliveries if not delivery["complete"]]
+        elif status_filter:
+            deliveries = [delivery for delivery in deliveries if delivery["status"] == status_filter]
+
+        page = deliveries[offset : offset + limit]
+        next_href = None
+        if offset + limit < len(deliveries):
+            next_href = f"{urlsplit(self.path).path}?limit={limit}&offset={offset + limit}"
+
+        return 200, {"object": "list", "data": page, "next_href": next_href, "total_count": len(deliveries)}
+
+    def _get_delivery(self, body: dict, params: dict, delivery_id: str) -> tuple[int, dict]:
+        delivery = self.state.deliveries.get(delivery_id)
+        if not delivery:
+            return 404, {"code": "delivery_not_found", "message": f"Delivery {delivery_id} not found"}
+        return 200, delivery
+
+    def _update_delivery(self, body: dict, params: dict, delivery_id: str) -> tuple[int, dict]:
+        with self.state.lock:
+            delivery = self.state.deliveries.get(delivery_id)
+            if not delivery:
+                return 404, {"code": "delivery_not_found", "message": f"Delivery {delivery_id} not found"}
+            delivery.update({key: value for key, value in body.items() if key not in ("id", "kind", "status")})
+            delivery["updated"] = _format_dt(datetime.now(timezone.utc))
+        return 200, delivery
+
+    def _cancel_delivery(self, body: dict, params: dict, delivery_id: str) -> tuple[int, dict]:
+        with self.state.lock:
+            delivery = self.state.deliveries.get(delivery_id)
+            if not delivery:
+                return 404, {"code": "delivery_not_found", "message": f"Delivery {delivery_id} not found"}
+            delivery.update({"status": "canceled", "complete": True, "updated": _format_dt(datetime.now(timezone.utc))})
+        return 200, delivery
+
+    def _proof_of_delivery(self, body: dict, params: dict, delivery_id: str) -> tuple[int, dict]:
+        if delivery_id not in self.state.deliveries:
+            return 404, {"code": "delivery_not_found", "message": f"Delivery {delivery_id} not found"}
+        return 200, {"document": "c3R1YiBwcm9vZiBvZiBkZWxpdmVyeQ=="}
+
+
+def start_stub_server(
+    certfile: str = None,
+    keyfile: str = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency_ms: float = 0,
+    jitter_ms: float = 0,
+    error_rate: float = 0.0,
+    error_status: int = 500,
+) -> tuple[ThreadingHTTPServer, str]:
+    """Start the stub server in a background thread and return it with its base URL.
+
+    The server's ``state`` holds the injected latency and errors, which can be
+    changed while it runs, the stored deliveries and per-endpoint request counts.
+    """
+    server = ThreadingHTTPServer((host, port), _StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(latency_ms, jitter_ms, error_rate, error_status)
+
+    scheme = "http"
+    if certfile:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    host, port = server.server_address
+    return server, f"{scheme}://{host}:{port}"
+
+
+def _format_dt(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--certfile", default=None)
+    parser.add_argument("--keyfile", default=None)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(
+        certfile=args.certfile,
+        keyfile=args.keyfile,
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    )
+    print(f"Uber Direct stub listening on {base_url}")
+    print(f'  "uberdirect_api_url": "{base_url}/v1", "uberdirect_oauth_url": "{base_url}"')
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
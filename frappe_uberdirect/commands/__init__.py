@@ -0,0 +1,57 @@
+"""Bench commands for frappe_uberdirect."""
+
+import json
+
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+
+@click.command("uberdirect-promoter")
+@click.option("--max-sleep", type=float, default=None, help="Longest sleep between promotions in seconds")
+@pass_context
+def uberdirect_promoter(context, max_sleep=None):
+    """Run the low-latency delayed job promoter."""
+    from frappe_uberdirect.utils.promoter import run_promoter
+
+    frappe.init(site=get_site(context))
+    try:
+        run_promoter(max_sleep=max_sleep)
+    finally:
+        frappe.destroy()
+
+
+@click.command("uberdirect-promoter-stats")
+@pass_context
+def uberdirect_promoter_stats(context):
+    """Show the delayed job promotion lag and scheduled backlog per queue."""
+    from frappe_uberdirect.utils.promoter import get_promoter_stats
+
+    frappe.init(site=get_site(context))
+    try:
+        click.echo(json.dumps(get_promoter_stats(), indent=2))
+    finally:
+        frappe.destroy()
+
+
+@click.command("uberdirect-stream-worker")
+@click.option("--partitions", default=None, help="Comma separated partitions to consume, all by default")
+@click.option("--batch-size", type=int, default=None, help="Entries read and acknowledged per batch")
+@pass_context
+def uberdirect_stream_worker(context, partitions=None, batch_size=None):
+    """Apply webhook events from the Redis Streams in order per delivery."""
+    from frappe_uberdirect.uber_integration.event_handlers.stream_events import run_stream_worker
+
+    frappe.init(site=get_site(context))
+    try:
+        partitions = [int(partition) for partition in partitions.split(",")] if partitions else None
+        run_stream_worker(partitions=partitions, batch_size=batch_size)
+    finally:
+        frappe.destroy()
+
+
+commands = [
+    uberdirect_promoter,
+    uberdirect_promoter_stats,
+    uberdirect_stream_worker,
+]
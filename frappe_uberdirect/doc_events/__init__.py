@@ -1,7 +1,15 @@
 """Document event handlers configuration for frappe_uberdirect."""
 
 custom_doc_events = {
-    # "Sales Invoice": {
-    #     "on_update": "frappe_uberdirect.doc_events.sales_invoice.update_sales_invoice",
-    # },
+    "Sales Invoice": {
+        "on_update": "frappe_uberdirect.doc_events.sales_invoice.update_sales_invoice",
+        "on_update_after_submit": "frappe_uberdirect.doc_events.sales_invoice.update_sales_invoice",
+    },
+    "Territory": {
+        "on_update": "frappe_uberdirect.doc_events.territory.update_territory",
+        "on_trash": "frappe_uberdirect.doc_events.territory.update_territory",
+    },
+    "ArcPOS Settings": {
+        "on_update": "frappe_uberdirect.doc_events.arcpos_settings.update_arcpos_settings",
+    },
 }
@@ -0,0 +1,7 @@
+"""ArcPOS Settings document event handlers."""
+
+from .update_arcpos_settings import update_arcpos_settings
+
+__all__ = [
+    "update_arcpos_settings",
+]
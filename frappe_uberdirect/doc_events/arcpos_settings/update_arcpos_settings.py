@@ -0,0 +1,15 @@
+"""Document event handlers for ArcPOS Settings updates.
+
+ArcPOS Settings holds the default outlet, so saving it invalidates the
+cached pickup context.
+"""
+
+from frappe_uberdirect.uber_integration.helper.pickup_context import invalidate_pickup_context
+
+
+def update_arcpos_settings(doc, method):
+    """
+    Invalidate the cached pickup context when ArcPOS Settings is saved.
+    """
+
+    invalidate_pickup_context()
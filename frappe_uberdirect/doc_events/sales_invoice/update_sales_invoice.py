@@ -1,11 +1,19 @@
 """Document event handlers for Sales Invoice updates.
 
-This module handles sales invoice update events and schedules delayed tasks
-for order notifications.
+This module starts the delivery process when a delivery order moves into
+the kitchen. It runs on every Sales Invoice save, so irrelevant saves are
+filtered in memory and never write anything.
 """
 
+import random
+
 import frappe
 from frappe_uberdirect.uber_integration.job_handlers import create_delivery_handler
+from frappe_uberdirect.uber_integration.lifecycle import IN_KITCHEN, record_lifecycle_event
+from frappe_uberdirect.utils.metrics import increment
+
+# fraction of skipped saves logged at debug level
+DEFAULT_LOG_SAMPLE_RATE = 0.01
 
 
 def update_sales_invoice(doc, method):
@@ -13,23 +21,38 @@ def update_sales_invoice(doc, method):
     Update sales invoice document events.
     """
 
-    frappe.log_error("Update sales invoice", f"Update sales invoice: {doc.name}")
-
     # if service type is not Delivery, return
     if doc.custom_service_type != "Delivery":
-        frappe.log_error(
-            "Service type is not Delivery",
-            f"Service type is not Delivery: {doc.custom_service_type}",
-        )
         return
 
-    # if order status is not Accepted, return
-    if doc.custom_order_status != "In kitchen":
-        frappe.log_error(
-            "Order status is not In kitchen",
-            f"Order status is not In kitchen: {doc.custom_order_status}",
+    # only the transition into In kitchen starts the delivery
+    if doc.custom_order_status != IN_KITCHEN or not doc.has_value_changed("custom_order_status"):
+        _log_sampled(
+            f"Sales invoice {doc.name} skipped, order status {doc.custom_order_status} is not a new {IN_KITCHEN}"
         )
         return
 
-    # this is a delivery order, so we need to start delivery proccess
-    frappe.enqueue(create_delivery_handler, queue="long", invoice_id=doc.name)
+    # the order enters the lifecycle timeline
+    record_lifecycle_event(doc.name, IN_KITCHEN)
+
+    # this is a delivery order, so we need to start delivery proccess, once per invoice
+    frappe.enqueue(
+        create_delivery_handler,
+        queue="long",
+        job_id=f"delivery_{doc.name}",
+        deduplicate=True,
+        enqueue_after_commit=True,
+        invoice_id=doc.name,
+    )
+    increment("delivery_trigger", result="enqueued")
+
+
+def _log_sampled(msg: str) -> None:
+    """Log a debug message for a sample of the calls."""
+
+    sample_rate = frappe.conf.get("uberdirect_trigger_log_sample_rate")
+    if sample_rate is None:
+        sample_rate = DEFAULT_LOG_SAMPLE_RATE
+
+    if random.random() < float(sample_rate):
+        frappe.logger(module="frappe_uberdirect").debug(msg)
@@ -0,0 +1,7 @@
+"""Territory document event handlers."""
+
+from .update_territory import update_territory
+
+__all__ = [
+    "update_territory",
+]
@@ -0,0 +1,15 @@
+"""Document event handlers for Territory updates.
+
+The default outlet is a Territory, so any change to a Territory invalidates
+the cached pickup context.
+"""
+
+from frappe_uberdirect.uber_integration.helper.pickup_context import invalidate_pickup_context
+
+
+def update_territory(doc, method):
+    """
+    Invalidate the cached pickup context when a Territory is saved or deleted.
+    """
+
+    invalidate_pickup_context()
@@ -0,0 +1,8 @@
+// Copyright (c) 2026, Excel Technologies Limited and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Delivery Lifecycle Event", {
+// 	refresh(frm) {
+
+// 	},
+// });
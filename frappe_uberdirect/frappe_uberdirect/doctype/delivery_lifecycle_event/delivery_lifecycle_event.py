@@ -0,0 +1,13 @@
+# Copyright (c) 2026, Excel Technologies Limited and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+
+
+class DeliveryLifecycleEvent(Document):
+	def validate(self):
+		# the timeline is append-only
+		if not self.is_new():
+			frappe.throw(_("Delivery lifecycle events cannot be changed"))
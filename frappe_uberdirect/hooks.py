@@ -148,7 +148,18 @@ doc_events = {
 # ---------------
 
 scheduler_events = {
-    "all": ["frappe_uberdirect.utils.scheduler.process_scheduled_jobs"],
+    "all": [
+        "frappe_uberdirect.utils.scheduler.process_scheduled_jobs",
+        "frappe_uberdirect.uber_integration.uber_auth.get_bearer_token.refresh_bearer_token_if_due",
+    ],
+    "hourly": [
+        "frappe_uberdirect.uber_integration.job_handlers.rollup_delivery_sla.rollup_delivery_sla",
+    ],
+    "cron": {
+        "*/5 * * * *": [
+            "frappe_uberdirect.uber_integration.job_handlers.reconcile_deliveries.reconcile_deliveries",
+        ],
+    },
 }
 
 # Testing
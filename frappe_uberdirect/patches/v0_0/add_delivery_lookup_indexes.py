@@ -0,0 +1,40 @@
+"""Add lookup indexes on ArcPOS Delivery delivery_id and order_no.
+
+Webhook handlers and APIs look deliveries up by these fields. ``delivery_id``
+gets a unique index. Empty values are normalized to NULL first so they do not
+collide; if it already has duplicate values a plain index is added instead and
+the duplicates are logged. ``order_no`` gets a plain index, since an order
+re-dispatched after a cancel has several deliveries.
+"""
+
+import frappe
+
+
+def execute():
+    if not frappe.db.table_exists("ArcPOS Delivery"):
+        return
+
+    add_lookup_index("delivery_id")
+    frappe.db.add_index("ArcPOS Delivery", ["order_no"], index_name="order_no_index")
+
+
+def add_lookup_index(fieldname: str) -> None:
+    """Add a unique index on ``fieldname``, or a plain one if it has duplicates."""
+
+    # empty values would violate the unique index, NULLs do not
+    frappe.db.sql(f"update `tabArcPOS Delivery` set `{fieldname}` = NULL where `{fieldname}` = ''")
+
+    duplicates = frappe.db.sql(
+        f"""select `{fieldname}` from `tabArcPOS Delivery`
+        where `{fieldname}` is not null
+        group by `{fieldname}` having count(*) > 1
+        limit 10""",
+        pluck=True,
+    )
+    if duplicates:
+        msg = f"Duplicate {fieldname} values {duplicates}, adding a non-unique index instead"
+        frappe.log_error("Uber Direct Delivery Indexes", msg)
+        frappe.db.add_index("ArcPOS Delivery", [fieldname], index_name=f"{fieldname}_index")
+        return
+
+    frappe.db.add_unique("ArcPOS Delivery", [fieldname], constraint_name=f"unique_{fieldname}")
@@ -4,9 +4,10 @@ from .create_quote import create_quote
 from .cancel_delivery import cancel_delivery
 from .create_delivery import create_delivery
 from .get_delivery import get_delivery
-from .list_deliveries import list_deliveries
+from .list_deliveries import iter_deliveries, list_deliveries
 from .update_delivery import update_delivery
 from .proof_of_delivery import proof_of_delivery
+from .quote_cache import create_quote_cached
 
 
 __all__ = [
@@ -15,6 +16,8 @@ __all__ = [
     "create_delivery",
     "get_delivery",
     "list_deliveries",
+    "iter_deliveries",
     "update_delivery",
     "proof_of_delivery",
+    "create_quote_cached",
 ]
@@ -1,8 +1,7 @@
 """Background job canceling a quote for an order."""
 
-import requests
-
 import frappe
+from .client import get_client
 from .helper import prepare_url, prepare_auth_header
 
 
@@ -22,7 +21,7 @@ def cancel_delivery(delivery_id: str, payload: dict = None) -> dict:
     headers = prepare_auth_header().get("headers")
 
     # send request
-    response = requests.post(url, headers=headers, json=payload, timeout=10)
+    response = get_client().post("cancel_delivery", url, headers=headers, json=payload)
 
     # check response
     if response.status_code != 200:
@@ -0,0 +1,182 @@
+"""Circuit breaker around outbound Uber Direct calls.
+
+The breaker state is kept in Redis so it is shared by every worker. Each
+endpoint tracks its requests and failures (5xx, 429, timeouts and connection
+errors) over a rolling window. When the failure rate crosses the threshold
+the circuit opens and calls fail fast with ``UberDirectCircuitOpenError``.
+After the open period a single half-open probe request is let through; its
+outcome closes or re-opens the circuit. State changes are published as
+realtime events and metrics.
+"""
+
+import time
+
+import frappe
+from frappe_uberdirect.utils.metrics import increment
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_SETTINGS = {
+    # failure rate over the window that opens the circuit
+    "failure_rate": 0.5,
+    # fewer requests than this in the window never open the circuit
+    "min_requests": 10,
+    # rolling window in seconds
+    "window": 60,
+    # how long the circuit stays open before a probe, in seconds
+    "open_seconds": 30,
+}
+
+# width of one rolling window bucket in seconds
+BUCKET_SECONDS = 10
+
+
+class UberDirectCircuitOpenError(frappe.ValidationError):
+    """Raised instead of calling Uber Direct while the endpoint's circuit is open."""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(f"Uber Direct {endpoint} is unavailable, retry in {retry_after:.0f}s")
+
+
+class CircuitBreaker:
+    """Redis-backed circuit breaker for one Uber Direct endpoint."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.settings = get_breaker_settings(endpoint)
+        self.is_probe = False
+
+        cache = frappe.cache()
+        self.cache = cache
+        self.state_key = cache.make_key(f"uberdirect_circuit:{endpoint}")
+        self.probe_key = cache.make_key(f"uberdirect_circuit_probe:{endpoint}")
+
+    def before_request(self) -> None:
+        """Let the request through, or raise if the circuit is open."""
+
+        state = self._get_state()
+        if state["state"] == CLOSED:
+            return
+
+        # still open
+        retry_after = state["opened_at"] + self.settings["open_seconds"] - time.time()
+        if retry_after > 0:
+            raise UberDirectCircuitOpenError(self.endpoint, retry_after)
+
+        # open period is over, let a single probe through
+        probe_timeout = max(int(self.settings["open_seconds"]), 1)
+        if not self.cache.set(self.probe_key, 1, nx=True, ex=probe_timeout):
+            raise UberDirectCircuitOpenError(self.endpoint, self.settings["open_seconds"])
+
+        self.is_probe = True
+        self._publish(HALF_OPEN)
+
+    def record(self, failed: bool, timed_out: bool = False) -> None:
+        """Record the outcome of a request."""
+
+        # the probe decides the state of the circuit
+        if self.is_probe:
+            if failed:
+                self._open()
+            else:
+                self._close()
+            self.cache.delete(self.probe_key)
+            return
+
+        # count the request in the current bucket
+        bucket_key = self._get_bucket_key(int(time.time() // BUCKET_SECONDS))
+        with self.cache.pipeline() as pipe:
+            pipe.hincrby(bucket_key, "requests", 1)
+            if failed:
+                pipe.hincrby(bucket_key, "failures", 1)
+            if timed_out:
+                pipe.hincrby(bucket_key, "timeouts", 1)
+            pipe.expire(bucket_key, int(self.settings["window"]) + BUCKET_SECONDS)
+            pipe.execute()
+
+        if not failed or self._get_state()["state"] != CLOSED:
+            return
+
+        if self._get_failure_rate() >= self.settings["failure_rate"]:
+            self._open()
+
+    def _get_state(self) -> dict:
+        # raw HGETALL, the state is stored without Frappe's pickling
+        state = self.cache.execute_command("HGETALL", self.state_key)
+        if not state:
+            return {"state": CLOSED, "opened_at": 0.0}
+
+        state = {_decode(key): _decode(value) for key, value in state.items()}
+        return {"state": state.get("state", CLOSED), "opened_at": float(state.get("opened_at", 0))}
+
+    def _get_failure_rate(self) -> float:
+        """Get the failure rate over the rolling window, 0 below the minimum volume."""
+
+        current = int(time.time() // BUCKET_SECONDS)
+        buckets = range(current - int(self.settings["window"]) // BUCKET_SECONDS + 1, current + 1)
+        with self.cache.pipeline() as pipe:
+            for bucket in buckets:
+                pipe.hmget(self._get_bucket_key(bucket), "requests", "failures")
+            counts = pipe.execute()
+
+        requests = sum(int(entry[0] or 0) for entry in counts)
+        failures = sum(int(entry[1] or 0) for entry in counts)
+        if requests < self.settings["min_requests"]:
+            return 0.0
+
+        return failures / requests
+
+    def _open(self) -> None:
+        self.cache.execute_command("HSET", self.state_key, "state", OPEN, "opened_at", time.time())
+        self._publish(OPEN)
+
+    def _close(self) -> None:
+        current = int(time.time() // BUCKET_SECONDS)
+        buckets = range(current - int(self.settings["window"]) // BUCKET_SECONDS, current + 1)
+        self.cache.delete(self.state_key, *(self._get_bucket_key(bucket) for bucket in buckets))
+        self._publish(CLOSED)
+
+    def _publish(self, state: str) -> None:
+        """Publish a state change of the circuit."""
+
+        increment("circuit_breaker_transitions", endpoint=self.endpoint, state=state)
+        frappe.logger(module="frappe_uberdirect").warning(f"Uber Direct {self.endpoint} circuit is {state}")
+        frappe.publish_realtime("uberdirect_circuit_state", {"endpoint": self.endpoint, "state": state})
+
+    def _get_bucket_key(self, bucket: int) -> str:
+        return self.cache.make_key(f"uberdirect_circuit_stats:{self.endpoint}:{bucket}")
+
+
+def get_breaker_settings(endpoint: str) -> dict:
+    """Get the breaker settings of an endpoint.
+
+    Defaults can be overridden for all endpoints or per endpoint:
+
+        "uberdirect_circuit_breaker": {"open_seconds": 60, "create_quote": {"failure_rate": 0.3}}
+    """
+    config = frappe.conf.get("uberdirect_circuit_breaker") or {}
+    overrides = {key: value for key, value in config.items() if key in DEFAULT_SETTINGS}
+    return {**DEFAULT_SETTINGS, **overrides, **(config.get(endpoint) or {})}
+
+
+def get_circuit_fallback(endpoint: str) -> str | None:
+    """Get the configured fallback of an endpoint while its circuit is open.
+
+    ``create_quote`` falls back to a cached quote and ``create_delivery`` to
+    deferred queuing; set ``"uberdirect_circuit_fallbacks": {"create_quote": null}``
+    to fail instead.
+    """
+    fallbacks = {
+        "create_quote": "cached_quote",
+        "create_delivery": "defer",
+        **(frappe.conf.get("uberdirect_circuit_fallbacks") or {}),
+    }
+    return fallbacks.get(endpoint)
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
@@ -0,0 +1,145 @@
+"""Pooled HTTP client for the Uber Direct integration.
+
+Every call to the Uber Direct API goes through one ``UberDirectClient`` per
+site and worker, so TCP and TLS connections are kept alive and reused
+between requests instead of being re-established for every call.
+"""
+
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import frappe
+from frappe_uberdirect.utils.metrics import observe
+
+from .circuit_breaker import CircuitBreaker
+
+# default connection pool size per host
+DEFAULT_POOL_SIZE = 10
+
+# default timeouts in seconds, per endpoint
+DEFAULT_TIMEOUT = 10
+DEFAULT_TIMEOUTS = {
+    "oauth_token": 30,
+    "create_quote": 10,
+    "create_delivery": 10,
+    "get_delivery": 10,
+    "list_deliveries": 10,
+    "update_delivery": 10,
+    "cancel_delivery": 10,
+    "proof_of_delivery": 10,
+}
+
+# clients of this worker, by site
+_clients = {}
+
+
+class UberDirectClient:
+    """HTTP client with a keep-alive connection pool and per-endpoint timeouts.
+
+    Every call is timed into the ``uber_request_duration_seconds`` histogram
+    unless ``instrument`` is off.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeouts: dict = None,
+        circuit_breaker: bool = True,
+        instrument: bool = True,
+    ):
+        self.pool_size = pool_size
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.circuit_breaker = circuit_breaker
+        self.instrument = instrument
+
+        # mount a pooled adapter for both schemes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get_timeout(self, endpoint: str) -> float:
+        """Get the timeout for an endpoint."""
+        return self.timeouts.get(endpoint, DEFAULT_TIMEOUT)
+
+    def request(self, method: str, endpoint: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the pooled session.
+
+        Args:
+            method: HTTP method (GET, POST, PUT, ...)
+            endpoint: Logical endpoint name used to pick the timeout and circuit
+            url: The complete URL
+            **kwargs: Extra arguments passed to ``requests.Session.request``
+
+        Raises:
+            UberDirectCircuitOpenError: The endpoint's circuit is open
+        """
+        kwargs.setdefault("timeout", self.get_timeout(endpoint))
+        if not self.circuit_breaker:
+            return self._send(method, endpoint, url, **kwargs)
+
+        breaker = CircuitBreaker(endpoint)
+        breaker.before_request()
+        try:
+            response = self._send(method, endpoint, url, **kwargs)
+        except requests.Timeout:
+            breaker.record(failed=True, timed_out=True)
+            raise
+        except requests.ConnectionError:
+            breaker.record(failed=True)
+            raise
+
+        breaker.record(failed=response.status_code >= 500 or response.status_code == 429)
+        return response
+
+    def _send(self, method: str, endpoint: str, url: str, **kwargs) -> requests.Response:
+        """Send the request and time it by endpoint and status."""
+
+        if not self.instrument:
+            return self.session.request(method, url, **kwargs)
+
+        status = "error"
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+            status = response.status_code
+            return response
+        except requests.Timeout:
+            status = "timeout"
+            raise
+        finally:
+            observe("uber_request_duration_seconds", time.perf_counter() - start, endpoint=endpoint, status=status)
+
+    def get(self, endpoint: str, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", endpoint, url, **kwargs)
+
+    def post(self, endpoint: str, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", endpoint, url, **kwargs)
+
+    def put(self, endpoint: str, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", endpoint, url, **kwargs)
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+
+def get_client() -> UberDirectClient:
+    """Get the Uber Direct client of the current site in this worker.
+
+    Each site gets its own client, with the pool size and timeouts read from
+    its site configuration:
+
+        "uberdirect_http_pool_size": 20,
+        "uberdirect_http_timeouts": {"create_quote": 5, "create_delivery": 15}
+    """
+    site = frappe.local.site
+    client = _clients.get(site)
+    if client is None:
+        pool_size = frappe.conf.get("uberdirect_http_pool_size") or DEFAULT_POOL_SIZE
+        timeouts = frappe.conf.get("uberdirect_http_timeouts") or {}
+        client = _clients.setdefault(site, UberDirectClient(pool_size=int(pool_size), timeouts=timeouts))
+
+    return client
@@ -1,8 +1,7 @@
 """Background job creating a quote for an order."""
 
-import requests
-
 import frappe
+from .client import get_client
 from .helper import prepare_url, prepare_auth_header
 
 
@@ -19,15 +18,12 @@ def create_quote(payload: dict = None) -> dict:
 
     # prepare url
     url = prepare_url(f"/customers/{customer_id}/delivery_quotes")
-    print(url)
 
     # prepare headers
     headers = prepare_auth_header().get("headers")
 
     # send request
-    response = requests.post(url, headers=headers, json=payload, timeout=10)
-
-    print(response.text)
+    response = get_client().post("create_quote", url, headers=headers, json=payload)
 
     # check response
     if response.status_code != 200:
@@ -0,0 +1,152 @@
+"""Latest known state of each delivery, pushed to POS clients in real time.
+
+The webhook handlers keep a snapshot of every delivery in a Redis hash: the
+latest Uber delivery object from the webhook's ``data``, with the status and
+the courier details (including the live location) in fields of their own.
+Each field is written with a single HSET, so a courier update and a status
+change applied at the same time never write back each other's older value,
+and the status only ever comes from a status change. Reading the snapshot
+overlays the status and courier on the delivery object, so it has the same
+shape as Uber's delivery.
+
+Each update is published to the room of the order's Sales Invoice as
+``uberdirect_delivery_update``. Status changes are always published. Other
+updates, mostly courier location, are throttled to one push per delivery per
+``uberdirect_realtime_throttle_ms``. An update held back by the throttle
+schedules one trailing push of the then current snapshot, so the last
+location of a burst always reaches the clients. Clients read the snapshot
+through ``get_delivery_api`` instead of polling Uber.
+"""
+
+import json
+from datetime import timedelta
+
+import frappe
+from frappe_uberdirect.utils.background_jobs import enqueue_delayed
+
+REALTIME_EVENT = "uberdirect_delivery_update"
+
+# how long a snapshot is kept after its last update, in seconds
+SNAPSHOT_TTL = 24 * 60 * 60
+
+# default shortest interval between pushes of a delivery, in milliseconds
+DEFAULT_THROTTLE_MS = 2000
+
+
+def _get_snapshot_key(delivery_id: str) -> str:
+    # a hash, named apart from the pickled snapshots written by earlier versions
+    return frappe.cache().make_key(f"uberdirect_delivery_snapshot_hash:{delivery_id}")
+
+
+def get_delivery_snapshot(delivery_id: str) -> dict | None:
+    """Get the latest snapshot of a delivery, in the shape of Uber's delivery object."""
+
+    with frappe.cache().pipeline() as pipe:
+        pipe.hgetall(_get_snapshot_key(delivery_id))
+        return _assemble(pipe.execute()[0])
+
+
+def update_delivery_snapshot(
+    delivery_id: str,
+    order_no: str,
+    delivery: dict = None,
+    status: str = None,
+    courier: dict = None,
+    publish: bool = True,
+) -> dict | None:
+    """Write an update into the snapshot of a delivery and push it to the order's room.
+
+    Args:
+        delivery_id: Uber delivery ID
+        order_no: Sales Invoice of the delivery, whose room receives the push
+        delivery: Uber delivery object, e.g. the webhook's ``data``
+        status: New Uber status, only passed for an applied status change
+        courier: Courier details, if any
+        publish: Push the snapshot to the clients
+
+    Returns:
+        dict | None: The updated snapshot
+    """
+    fields = {"order_no": order_no or ""}
+    if delivery:
+        fields["delivery"] = json.dumps(delivery)
+    if status:
+        fields["status"] = status
+    if courier:
+        fields["courier"] = json.dumps(courier)
+
+    # write the fields and read the result in one transaction
+    snapshot_key = _get_snapshot_key(delivery_id)
+    with frappe.cache().pipeline() as pipe:
+        pipe.hset(snapshot_key, mapping=fields)
+        pipe.expire(snapshot_key, SNAPSHOT_TTL)
+        pipe.hgetall(snapshot_key)
+        snapshot = _assemble(pipe.execute()[-1])
+
+    if not (publish and order_no and snapshot):
+        return snapshot
+
+    if status or _claim_push(delivery_id):
+        frappe.publish_realtime(
+            REALTIME_EVENT,
+            snapshot,
+            doctype="Sales Invoice",
+            docname=order_no,
+            after_commit=True,
+        )
+    else:
+        # throttled, push the latest snapshot once the window ends
+        enqueue_delayed(
+            push_delivery_snapshot,
+            delay=timedelta(milliseconds=_get_throttle_ms()),
+            queue="short",
+            job_id=f"uberdirect_snapshot_push_{delivery_id}",
+            deduplicate=True,
+            delivery_id=delivery_id,
+            order_no=order_no,
+        )
+
+    return snapshot
+
+
+def push_delivery_snapshot(delivery_id: str, order_no: str) -> None:
+    """Push the current snapshot of a delivery, the trailing push of a throttled burst."""
+
+    snapshot = get_delivery_snapshot(delivery_id)
+    if not snapshot:
+        return
+
+    # the trailing push opens the next throttle window
+    _claim_push(delivery_id, force=True)
+    frappe.publish_realtime(REALTIME_EVENT, snapshot, doctype="Sales Invoice", docname=order_no)
+
+
+def _assemble(raw: dict) -> dict | None:
+    """Build the delivery object from the snapshot fields."""
+
+    fields = {_decode(key): _decode(value) for key, value in (raw or {}).items()}
+    if not fields.get("delivery") and not fields.get("status"):
+        return None
+
+    snapshot = json.loads(fields["delivery"]) if fields.get("delivery") else {}
+    if fields.get("status"):
+        snapshot["status"] = fields["status"]
+    if fields.get("courier"):
+        snapshot["courier"] = json.loads(fields["courier"])
+
+    return snapshot
+
+
+def _claim_push(delivery_id: str, force: bool = False) -> bool:
+    """Claim the next push of a delivery, False while the last one is too recent."""
+
+    push_key = frappe.cache().make_key(f"uberdirect_delivery_push:{delivery_id}")
+    return bool(frappe.cache().set(push_key, 1, nx=not force, px=_get_throttle_ms()))
+
+
+def _get_throttle_ms() -> int:
+    return int(frappe.conf.get("uberdirect_realtime_throttle_ms") or DEFAULT_THROTTLE_MS)
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
@@ -0,0 +1,149 @@
+"""Monotonic status state machine for ``ArcPOS Delivery``.
+
+Uber can deliver status webhooks out of order or more than once. Before a
+delivery is loaded for write, the incoming status is checked against the
+last applied one with an atomic compare-and-set in Redis:
+
+- a repeat of the current status is dropped;
+- a delivered, canceled or returned delivery only moves forward
+  (``canceled`` to ``returned``);
+- when both events carry a timestamp, only a newer event is applied, which
+  lets a courier reassignment move a delivery back to ``pending``;
+- without timestamps, only a status further down the flow is applied.
+
+The state is seeded from the delivery's stored status when Redis has none.
+An applied transition is forgotten again if its transaction rolls back, so
+Uber's retry of the event is not dropped as a repeat.
+"""
+
+from datetime import datetime
+
+import frappe
+
+# position of each Uber status in the delivery flow
+STATUS_RANKS = {
+    "pending": 0,
+    "pickup": 1,
+    "pickup_complete": 2,
+    "dropoff": 3,
+    "delivered": 5,
+    "canceled": 5,
+    "returned": 6,
+}
+
+# statuses from this rank on are final
+TERMINAL_RANK = 5
+
+# rank of a delivery without a status yet
+NO_STATUS_RANK = -1
+
+# how long the applied state of a delivery is kept, in seconds
+STATE_TTL = 7 * 24 * 60 * 60
+
+# returns 1 when the transition is applied, 0 when it is stale and -1 when
+# the current state is unknown and must be seeded from the DB
+TRANSITION_SCRIPT = """
+local current = redis.call('HMGET', KEYS[1], 'status', 'rank', 'ts')
+local status, rank, ts = current[1], tonumber(current[2]), tonumber(current[3])
+if not status then
+    if ARGV[5] == '0' then
+        return -1
+    end
+    status, rank, ts = ARGV[6], tonumber(ARGV[7]), 0
+end
+
+local new_status, new_rank, new_ts = ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3])
+local terminal_rank = tonumber(ARGV[8])
+if new_status == status then
+    return 0
+end
+if rank >= terminal_rank and new_rank <= rank then
+    return 0
+end
+if new_ts > 0 and ts > 0 then
+    if new_ts <= ts then
+        return 0
+    end
+elseif new_rank < rank then
+    return 0
+end
+
+if new_ts <= 0 then
+    new_ts = ts
+end
+redis.call('HSET', KEYS[1], 'status', new_status, 'rank', new_rank, 'ts', new_ts)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+
+def _get_state_key(delivery_id: str) -> str:
+    return frappe.cache().make_key(f"uberdirect_delivery_state:{delivery_id}")
+
+
+def apply_transition(delivery_id: str, delivery_name: str, status: str, event_time: str | None = None) -> bool:
+    """Record a status transition of a delivery if it moves the delivery forward.
+
+    Args:
+        delivery_id: Uber delivery ID
+        delivery_name: ``ArcPOS Delivery`` name, read only when the state is not cached
+        status: The incoming Uber status
+        event_time: RFC 3339 creation time of the event, e.g. the webhook's ``created``
+
+    Returns:
+        bool: True if the transition must be applied, False if it is stale or a repeat
+    """
+    cache = frappe.cache()
+    script = cache.register_script(TRANSITION_SCRIPT)
+    args = [
+        status,
+        get_status_rank(status),
+        _parse_timestamp(event_time),
+        STATE_TTL,
+        # no seed on the first try
+        0,
+        "",
+        NO_STATUS_RANK,
+        TERMINAL_RANK,
+    ]
+
+    result = script(keys=[_get_state_key(delivery_id)], args=args)
+    if result == -1:
+        # seed the state from the stored status
+        stored_status = frappe.db.get_value("ArcPOS Delivery", delivery_name, "status") or ""
+        stored_rank = get_status_rank(stored_status) if stored_status else NO_STATUS_RANK
+        args[4:7] = [1, stored_status, stored_rank]
+        result = script(keys=[_get_state_key(delivery_id)], args=args)
+
+    if result != 1:
+        return False
+
+    # the DB row was never written if the transaction rolls back
+    frappe.db.after_rollback.add(lambda: forget_transition(delivery_id))
+    return True
+
+
+def forget_transition(delivery_id: str) -> None:
+    """Forget the cached state of a delivery, e.g. when applying its transition failed.
+
+    The next transition is checked against the stored status again.
+    """
+    frappe.cache().delete(_get_state_key(delivery_id))
+
+
+def get_status_rank(status: str) -> int:
+    """Get the position of a status in the delivery flow, unknown statuses come first."""
+    return STATUS_RANKS.get(status, 0)
+
+
+def _parse_timestamp(value: str | None) -> int:
+    """Get the unix time in milliseconds of an RFC 3339 timestamp, 0 if missing or invalid.
+
+    Whole milliseconds keep the value an integer inside the Lua script.
+    """
+    if not value:
+        return 0
+    try:
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp() * 1000)
+    except ValueError:
+        return 0
@@ -0,0 +1,202 @@
+"""Coalescing of courier_update webhook events.
+
+Courier updates are parked in a Redis hash keyed by ``delivery_id``, so a
+newer update for the same delivery replaces the older one. A single flush
+job then applies only the latest update of each delivery, giving one DB
+write per delivery per window instead of one per event. Flushes hold a lock
+while they drain and apply, so an older batch is never applied after a newer
+one. A flush never waits for the lock: it tries again shortly instead. Events
+whose handler fails are parked again for a few flushes before they are
+dropped.
+
+``delivery_status`` events are not coalesced: every transition is applied,
+so the lifecycle timeline keeps each step.
+"""
+
+import json
+from datetime import timedelta
+
+import frappe
+from redis.exceptions import LockError
+
+from frappe_uberdirect.utils.background_jobs import enqueue_delayed
+from frappe_uberdirect.utils.metrics import increment
+
+from .courier_update_handler import courier_update_handler
+
+COALESCED_HANDLERS = {
+    "courier_update": courier_update_handler,
+}
+
+# default coalescing window in seconds, 0 flushes as soon as a worker is free
+DEFAULT_WINDOW = 0
+
+# the flush flag expires in case its job is lost, so new events reschedule it
+MIN_FLAG_TTL = 60
+
+# how long a flush may hold the lock
+FLUSH_LOCK_TIMEOUT = 300
+
+# delay before a flush that found the lock taken, or events that failed, are tried again, in seconds
+FLUSH_RETRY_DELAY = 1
+
+# flushes an event may fail before it is dropped
+MAX_FLUSH_ATTEMPTS = 3
+
+FLUSH_METHOD = "frappe_uberdirect.uber_integration.event_handlers.coalesce_events.flush_coalesced_events"
+
+
+def _get_keys(kind: str) -> tuple[str, str, str, str]:
+    """Get the pending hash, received counter, flush flag and flush lock keys of a kind."""
+
+    cache = frappe.cache()
+    return (
+        cache.make_key(f"uberdirect_webhook_pending:{kind}"),
+        cache.make_key(f"uberdirect_webhook_received:{kind}"),
+        cache.make_key(f"uberdirect_webhook_flush_scheduled:{kind}"),
+        cache.make_key(f"uberdirect_webhook_flush_lock:{kind}"),
+    )
+
+
+def is_coalescing_enabled(kind: str) -> bool:
+    if kind not in COALESCED_HANDLERS:
+        return False
+    return bool(frappe.conf.get("uberdirect_webhook_coalescing", True))
+
+
+def coalesce_event(kind: str, payload: dict) -> bool:
+    """Park a webhook event until the next flush of its kind.
+
+    Returns:
+        bool: False if the event has no delivery ID and must be handled on its own
+    """
+    delivery_id = payload.get("delivery_id")
+    if not delivery_id:
+        return False
+
+    window = float(frappe.conf.get("uberdirect_webhook_coalesce_window") or DEFAULT_WINDOW)
+    pending_key, received_key, flag_key, _ = _get_keys(kind)
+
+    # replace any pending event of the delivery and claim the flush
+    with frappe.cache().pipeline() as pipe:
+        pipe.hset(pending_key, delivery_id, json.dumps(payload))
+        pipe.incr(received_key)
+        pipe.set(flag_key, 1, nx=True, ex=max(int(window * 10), MIN_FLAG_TTL))
+        flush_claimed = pipe.execute()[-1]
+
+    increment("webhook_coalescing", kind=kind, stage="received")
+    if not flush_claimed:
+        return True
+
+    # schedule the single flush of this kind
+    if window > 0:
+        enqueue_delayed(FLUSH_METHOD, delay=timedelta(seconds=window), queue="short", kind=kind)
+    else:
+        frappe.enqueue(FLUSH_METHOD, queue="short", kind=kind)
+
+    return True
+
+
+def flush_coalesced_events(kind: str) -> None:
+    """Apply the latest pending event of every delivery of a kind."""
+
+    pending_key, received_key, flag_key, lock_key = _get_keys(kind)
+    cache = frappe.cache()
+
+    # one flush at a time, so batches are applied in the order they were drained;
+    # never wait for the lock, that would hold a short queue worker
+    lock = cache.lock(lock_key, timeout=FLUSH_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        # another flush is running, try again shortly; the flag still blocks other schedules
+        enqueue_delayed(FLUSH_METHOD, delay=timedelta(seconds=FLUSH_RETRY_DELAY), queue="short", kind=kind)
+        return
+
+    try:
+        _flush(kind, pending_key, received_key, flag_key)
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            # lock expired while applying, nothing to release
+            pass
+
+
+def _flush(kind: str, pending_key: str, received_key: str, flag_key: str) -> None:
+    """Drain and apply the pending events of a kind, while holding its flush lock."""
+
+    handler = COALESCED_HANDLERS[kind]
+
+    # events arriving from now on schedule the next flush
+    cache = frappe.cache()
+    cache.delete(flag_key)
+
+    # drain the pending events atomically
+    with cache.pipeline(transaction=True) as pipe:
+        pipe.hgetall(pending_key)
+        pipe.getset(received_key, 0)
+        pipe.delete(pending_key)
+        pending, received, _ = pipe.execute()
+
+    if not pending:
+        return
+
+    applied = 0
+    failed = {}
+    for delivery_id, payload in pending.items():
+        delivery_id = delivery_id.decode() if isinstance(delivery_id, bytes) else delivery_id
+        payload = json.loads(payload)
+        try:
+            handler(payload=payload)
+            frappe.db.commit()
+            applied += 1
+        except Exception as e:
+            frappe.db.rollback()
+
+            # park the event again for the next flush
+            attempts = int(payload.get("_flush_attempts") or 0) + 1
+            if attempts < MAX_FLUSH_ATTEMPTS:
+                failed[delivery_id] = {**payload, "_flush_attempts": attempts}
+                continue
+
+            # give up, and let a redelivery of the event through
+            _forget_event(kind, payload)
+            msg = f"Failed to apply coalesced {kind} event for delivery {delivery_id}: {e!s}"
+            frappe.log_error("Uber Direct Webhook Coalescing", msg)
+
+    if failed:
+        _park_failed(kind, failed, pending_key, flag_key)
+
+    increment("webhook_coalescing", amount=applied, kind=kind, stage="applied")
+
+    # log the coalescing ratio of this flush
+    received = int(received or 0)
+    ratio = received / len(pending) if pending else 0
+    frappe.logger(module="frappe_uberdirect").info(
+        f"Applied {applied} {kind} events coalesced from {received} received (ratio {ratio:.2f})"
+    )
+
+
+def _park_failed(kind: str, failed: dict, pending_key: str, flag_key: str) -> None:
+    """Put events that failed back in the pending hash and make sure a flush follows.
+
+    A newer event of the same delivery parked in the meantime wins.
+    """
+    with frappe.cache().pipeline() as pipe:
+        for delivery_id, payload in failed.items():
+            pipe.hsetnx(pending_key, delivery_id, json.dumps(payload))
+        pipe.set(flag_key, 1, nx=True, ex=MIN_FLAG_TTL)
+        flush_claimed = pipe.execute()[-1]
+
+    increment("webhook_coalescing", amount=len(failed), kind=kind, stage="retried")
+    if flush_claimed:
+        enqueue_delayed(FLUSH_METHOD, delay=timedelta(seconds=FLUSH_RETRY_DELAY), queue="short", kind=kind)
+
+
+def _forget_event(kind: str, payload: dict) -> None:
+    """Forget that a dropped event was seen, so Uber's redelivery is applied."""
+
+    # imported here, the webhook endpoints import this module
+    from frappe_uberdirect.api.webhook.helper.dedupe_webhook import forget_webhook_event
+
+    if payload.get("_event_id"):
+        forget_webhook_event(kind, payload["_event_id"])
@@ -1,5 +1,20 @@
 import json
 import frappe
+from frappe.utils import cstr, flt
+from frappe_uberdirect.utils.metrics import observe_since
+
+from ..delivery_snapshot import update_delivery_snapshot
+from ..helper.delivery_lookup import get_delivery_mapping
+from ..lifecycle import COURIER_ASSIGNED, record_lifecycle_event
+
+# delivery field for each courier detail in the payload
+COURIER_FIELD_MAP = {
+    "name": "courier_name",
+    "phone_number": "courier_phone_number",
+    "rating": "courier_rating",
+    "vehicle_type": "courier_vehicle_type",
+    "img_href": "courier_img_href",
+}
 
 
 def courier_update_handler(payload: dict) -> None:
@@ -9,8 +24,11 @@ def courier_update_handler(payload: dict) -> None:
     if not delivery_id:
         frappe.throw("Delivery ID is required")
 
-    # get the delivery doc
-    delivery = frappe.get_doc("ArcPOS Delivery", {"delivery_id": delivery_id})
+    # get the stored courier details
+    mapping = get_delivery_mapping(delivery_id=delivery_id)
+    delivery_name = mapping and mapping["name"]
+    fields = [*COURIER_FIELD_MAP.values(), "custom_public_phone_info"]
+    delivery = delivery_name and frappe.db.get_value("ArcPOS Delivery", delivery_name, fields, as_dict=True)
     if not delivery:
         msg = f"Delivery not found for delivery {delivery_id}"
         frappe.log_error("Uber Direct Courier Update", msg)
@@ -23,19 +41,39 @@ def courier_update_handler(payload: dict) -> None:
         frappe.log_error("Uber Direct Courier Update", msg)
         return
 
-    # update the courier details
-    delivery.courier_name = courier_details.get("name", None)
-    delivery.courier_phone_number = courier_details.get("phone_number", None)
-    delivery.courier_rating = courier_details.get("rating", None)
-    delivery.courier_vehicle_type = courier_details.get("vehicle_type", None)
-    delivery.courier_img_href = courier_details.get("img_href", None)
-    delivery.custom_public_phone_info = json.dumps(
-        courier_details.get("public_phone_info", None)
-    )
+    # push the courier details and location to the order's clients
+    update_delivery_snapshot(delivery_id, mapping["order_no"], courier=courier_details)
+
+    # collect the courier details that changed
+    incoming = {field: courier_details.get(key, None) for key, field in COURIER_FIELD_MAP.items()}
+    incoming["custom_public_phone_info"] = json.dumps(courier_details.get("public_phone_info", None))
+    changes = {field: value for field, value in incoming.items() if _has_changed(field, delivery.get(field), value)}
+
+    # nothing changed, skip the write
+    if not changes:
+        observe_since("webhook_apply_lag_seconds", payload.get("_received_at"), kind="courier_update")
+        frappe.logger().info(f"Courier details unchanged for delivery {delivery_id}")
+        return
+
+    # write only the changed fields
+    frappe.db.set_value("ArcPOS Delivery", delivery_name, changes)
+    observe_since("webhook_apply_lag_seconds", payload.get("_received_at"), kind="courier_update")
 
-    # save the delivery doc
-    delivery.save(ignore_permissions=True)
+    # the first courier details mark the courier assignment on the timeline
+    if not delivery.courier_name and changes.get("courier_name"):
+        record_lifecycle_event(
+            mapping["order_no"], COURIER_ASSIGNED, delivery_id=delivery_id, received_at=payload.get("_received_at")
+        )
 
     # log the event
-    msg = f"Courier details updated for delivery {delivery_id}"
+    msg = f"Courier details updated for delivery {delivery_id}: {', '.join(changes)}"
     frappe.logger().info(msg)
+
+
+def _has_changed(field: str, stored, incoming) -> bool:
+    """Compare a stored courier field with the incoming value."""
+
+    if field == "courier_rating":
+        return flt(stored) != flt(incoming)
+
+    return cstr(stored) != cstr(incoming)
@@ -1,4 +1,27 @@
 import frappe
+from frappe.utils import now
+from frappe_uberdirect.utils.metrics import increment, observe_since
+
+from ..delivery_snapshot import update_delivery_snapshot
+from ..delivery_state import apply_transition, forget_transition
+from ..helper.delivery_lookup import get_delivery_name
+from ..lifecycle import STATUS_EVENTS, record_lifecycle_event
+
+# sales invoice order status for each delivery status
+ORDER_STATUS_MAP = {
+    "delivered": "Delivered",
+    "pickup_complete": "Handover to Delivery",
+    "dropoff": "On the Way",
+    "canceled": "Ready to Deliver",
+}
+
+# sales invoice delivery partner status for each delivery status
+PARTNER_STATUS_MAP = {
+    "delivered": "Delivered",
+    "pickup_complete": "Rider on Delivery",
+    "dropoff": "Rider on Delivery",
+    "canceled": "Cancelled from Marchant",
+}
 
 
 def delivery_status_handler(payload: dict) -> None:
@@ -9,43 +32,134 @@ def delivery_status_handler(payload: dict) -> None:
     if not delivery_id:
         frappe.throw("Delivery ID is required")
 
-    # get the delivery doc
     delivery_status = payload.get("status", None)
-    delivery = frappe.get_doc("ArcPOS Delivery", {"delivery_id": delivery_id})
-    if not delivery:
+    if not delivery_status:
+        frappe.throw("Delivery status is required")
+
+    delivery_name = get_delivery_name(delivery_id)
+    if not delivery_name:
         frappe.throw("Delivery not found")
 
-    # update the delivery doc
-    delivery.status = delivery_status
-    delivery.save(ignore_permissions=True)
-
-    # update the sales invoice doc
-
-    map_status = {
-        "delivered": "Delivered",
-        "pickup_complete": "Handover to Delivery",
-        "dropoff": "On the Way",
-        "canceled": "Ready to Deliver",
-    }
-
-    partner_map = {
-        "delivered": "Delivered",
-        "pickup_complete": "Rider on Delivery",
-        "dropoff": "Rider on Delivery",
-        "canceled": "Cancelled from Marchant",
-    }
-
-    if delivery_status in map_status:
-        invoice_doc = frappe.get_doc("Sales Invoice", delivery.order_no)
-        if invoice_doc:
-            invoice_doc.custom_order_status = map_status[delivery_status]
-            invoice_doc.custom_delivery_partner_status = partner_map[delivery_status]
-            if delivery_status == "delivered":
-                for item in invoice_doc.items:
-                    item.custom_order_item_status = "Delivered"
-            invoice_doc.save(ignore_permissions=True)
+    # drop stale and repeated transitions before loading anything
+    if not apply_transition(delivery_id, delivery_name, delivery_status, event_time=payload.get("created")):
+        increment("delivery_transitions", result="rejected", status=delivery_status)
+        frappe.logger(module="frappe_uberdirect").info(
+            f"Stale or repeated status {delivery_status} dropped for delivery {delivery_id}"
+        )
+        return
+
+    try:
+        # update the delivery doc
+        delivery = frappe.get_doc("ArcPOS Delivery", delivery_name)
+        delivery.status = delivery_status
+        delivery.save(ignore_permissions=True)
+
+        # update the sales invoice doc
+        if delivery_status in ORDER_STATUS_MAP:
+            update_invoice_status(invoice_id=delivery.order_no, delivery_status=delivery_status)
+    except Exception:
+        # the transition was not applied, check the next one against the DB
+        forget_transition(delivery_id)
+        raise
+
+    increment("delivery_transitions", result="applied", status=delivery_status)
+
+    # push the new status to the order's clients
+    update_delivery_snapshot(
+        delivery_id,
+        delivery.order_no,
+        delivery=payload.get("data"),
+        status=delivery_status,
+    )
+    observe_since("webhook_apply_lag_seconds", payload.get("_received_at"), kind="delivery_status")
+
+    # record the step on the lifecycle timeline
+    if delivery_status in STATUS_EVENTS:
+        record_lifecycle_event(
+            delivery.order_no,
+            STATUS_EVENTS[delivery_status],
+            delivery_id=delivery_id,
+            received_at=payload.get("_received_at"),
+        )
 
     # log the event
     frappe.logger(module="frappe_uberdirect", with_more_info=True).info(
         f"Delivery status updated successfully for delivery {delivery_id} to {delivery.status}"
     )
+
+
+def update_invoice_status(invoice_id: str, delivery_status: str) -> None:
+    """Apply a delivery status to the sales invoice.
+
+    Uses targeted field writes unless ``uberdirect_full_invoice_save`` is set,
+    in which case the invoice is saved with its full validation chain.
+    """
+    if frappe.conf.get("uberdirect_full_invoice_save"):
+        save_invoice_status(invoice_id, delivery_status)
+    else:
+        set_invoice_status(invoice_id, delivery_status)
+
+
+def set_invoice_status(invoice_id: str | list[str], delivery_status: str) -> None:
+    """Write the status fields directly, without loading or saving the invoices.
+
+    Accepts one invoice or a list of invoices that get the same status, so a
+    batch costs the same handful of queries as a single invoice.
+    """
+    invoice_ids = [invoice_id] if isinstance(invoice_id, str) else list(invoice_id)
+    if not invoice_ids:
+        return
+
+    modified = now()
+    modified_by = frappe.session.user
+
+    # update the invoice status fields
+    invoice = frappe.qb.DocType("Sales Invoice")
+    (
+        frappe.qb.update(invoice)
+        .set(invoice.custom_order_status, ORDER_STATUS_MAP[delivery_status])
+        .set(invoice.custom_delivery_partner_status, PARTNER_STATUS_MAP[delivery_status])
+        .set(invoice.modified, modified)
+        .set(invoice.modified_by, modified_by)
+        .where(invoice.name.isin(invoice_ids))
+    ).run()
+
+    # mark every item delivered in one statement
+    if delivery_status == "delivered":
+        item = frappe.qb.DocType("Sales Invoice Item")
+        (
+            frappe.qb.update(item)
+            .set(item.custom_order_item_status, "Delivered")
+            .set(item.modified, modified)
+            .set(item.modified_by, modified_by)
+            .where(item.parent.isin(invoice_ids) & (item.parenttype == "Sales Invoice"))
+        ).run()
+
+    # notify clients the same way Document.save does
+    for name in invoice_ids:
+        frappe.clear_document_cache("Sales Invoice", name)
+        frappe.publish_realtime(
+            "doc_update",
+            {"modified": modified, "doctype": "Sales Invoice", "name": name},
+            doctype="Sales Invoice",
+            docname=name,
+            after_commit=True,
+        )
+        frappe.publish_realtime(
+            "list_update",
+            {"doctype": "Sales Invoice", "name": name, "user": modified_by},
+            after_commit=True,
+        )
+
+
+def save_invoice_status(invoice_id: str, delivery_status: str) -> None:
+    """Set the status fields on the invoice document and save it."""
+
+    invoice_doc = frappe.get_doc("Sales Invoice", invoice_id)
+    if invoice_doc:
+        invoice_doc.custom_order_status = ORDER_STATUS_MAP[delivery_status]
+        invoice_doc.custom_delivery_partner_status = PARTNER_STATUS_MAP[delivery_status]
+        if delivery_status == "delivered":
+            for item in invoice_doc.items:
+                item.custom_order_item_status = "Delivered"
+        invoice_doc.save(ignore_permissions=True)
@@ -1,4 +1,5 @@
 import frappe
+from frappe_uberdirect.utils.metrics import observe_since
 
 
 def refund_request_handler(payload: dict) -> None:
@@ -12,6 +13,8 @@ def refund_request_handler(payload: dict) -> None:
     # print delivery id
     print(f"Refund request event received for delivery: {delivery_id}")
 
+    observe_since("webhook_apply_lag_seconds", payload.get("_received_at"), kind="refund_request")
+
     # log the event
     frappe.logger(module="frappe_uberdirect", with_more_info=True).info(f"Refund request event received for delivery: {delivery_id}")
     
\ No newline at end of file
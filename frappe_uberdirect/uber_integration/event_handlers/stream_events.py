@@ -0,0 +1,226 @@
+"""Redis Streams ingestion of webhook events.
+
+With ``"uberdirect_webhook_ingestion": "stream"`` the webhook endpoints
+append the verified payload to one of several Redis Streams and return. The
+stream is picked from a hash of the ``delivery_id``, so all events of a
+delivery land in the same partition. The stream worker consumes every
+partition in its own thread through a consumer group: events of one
+delivery are applied in the order they were received, while different
+partitions are applied in parallel. Entries are acknowledged in batches
+once their changes are committed. Events that fail are copied to a
+dead-letter stream.
+
+Each partition must be consumed by a single worker process, otherwise the
+consumer group would split its entries and the ordering would be lost.
+"""
+
+import json
+import signal
+import socket
+import threading
+import time
+import zlib
+
+import frappe
+from frappe_uberdirect.utils.metrics import increment
+from frappe_uberdirect.utils.site_context import site_context
+from redis.exceptions import ResponseError
+
+from ..delivery_state import forget_transition
+from .courier_update_handler import courier_update_handler
+from .delivery_status_handler import delivery_status_handler
+from .refund_request_handler import refund_request_handler
+
+STREAM_HANDLERS = {
+    "delivery_status": delivery_status_handler,
+    "courier_update": courier_update_handler,
+    "refund_request": refund_request_handler,
+}
+
+CONSUMER_GROUP = "uberdirect_webhook_workers"
+
+# default number of partitions
+DEFAULT_PARTITIONS = 8
+
+# approximate number of entries kept per stream and in the dead-letter stream
+STREAM_MAXLEN = 100_000
+DEAD_LETTER_MAXLEN = 10_000
+
+# entries read and acknowledged per batch
+DEFAULT_BATCH_SIZE = 100
+
+# how long a read waits for new entries, in milliseconds
+BLOCK_MS = 1000
+
+
+def is_stream_ingestion_enabled(kind: str) -> bool:
+    if kind not in STREAM_HANDLERS:
+        return False
+    return frappe.conf.get("uberdirect_webhook_ingestion") == "stream"
+
+
+def get_partition_count() -> int:
+    return int(frappe.conf.get("uberdirect_webhook_stream_partitions") or DEFAULT_PARTITIONS)
+
+
+def get_partition(delivery_id: str | None) -> int:
+    """Get the partition of a delivery, stable across processes unlike ``hash``."""
+    return zlib.crc32((delivery_id or "").encode()) % get_partition_count()
+
+
+def _get_stream_key(partition: int) -> str:
+    return frappe.cache().make_key(f"uberdirect_webhook_stream:{partition}")
+
+
+def _get_dead_letter_key() -> str:
+    return frappe.cache().make_key("uberdirect_webhook_dead_letter")
+
+
+def publish_event(kind: str, payload: dict) -> str:
+    """Append a webhook event to the stream of its delivery's partition.
+
+    Returns:
+        str: The stream entry ID
+    """
+    partition = get_partition(payload.get("delivery_id"))
+    entry_id = frappe.cache().xadd(
+        _get_stream_key(partition),
+        {"kind": kind, "payload": json.dumps(payload)},
+        maxlen=STREAM_MAXLEN,
+        approximate=True,
+    )
+
+    increment("webhook_stream", kind=kind, stage="published")
+    return entry_id
+
+
+class StreamWorker:
+    """Consume the webhook streams, one thread per partition."""
+
+    def __init__(self, partitions: list[int] | None = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.partitions = partitions if partitions is not None else list(range(get_partition_count()))
+        self.batch_size = batch_size
+        self.site = frappe.local.site
+        self.sites_path = frappe.local.sites_path
+        self.hostname = socket.gethostname()
+        self.running = False
+
+    def run(self) -> None:
+        """Consume every partition until stopped with SIGINT or SIGTERM."""
+
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        threads = [
+            threading.Thread(target=self.consume, args=(partition,), name=f"uberdirect_stream_{partition}")
+            for partition in self.partitions
+        ]
+        for thread in threads:
+            thread.start()
+
+        frappe.logger(module="frappe_uberdirect").info(
+            f"Webhook stream worker started for partitions {self.partitions} on {self.hostname}"
+        )
+        for thread in threads:
+            thread.join()
+
+    def stop(self, *args) -> None:
+        self.running = False
+
+    def consume(self, partition: int) -> None:
+        """Apply the events of one partition in order."""
+
+        with site_context(self.site, self.sites_path, user="Administrator"):
+            stream_key = _get_stream_key(partition)
+            consumer = f"partition-{partition}"
+            _create_group(stream_key)
+
+            # entries read before a crash but never acknowledged come first
+            last_id = "0"
+            while self.running:
+                try:
+                    response = frappe.cache().xreadgroup(
+                        CONSUMER_GROUP,
+                        consumer,
+                        {stream_key: last_id},
+                        count=self.batch_size,
+                        block=BLOCK_MS,
+                    )
+                    entries = response[0][1] if response else []
+
+                    # the backlog is recovered, switch to new entries
+                    if last_id == "0" and not entries:
+                        last_id = ">"
+                        continue
+
+                    if entries:
+                        self.apply_batch(stream_key, entries)
+                except Exception as e:
+                    frappe.logger(module="frappe_uberdirect").error(
+                        f"Error in webhook stream worker for partition {partition}: {e!s}",
+                        exc_info=True,
+                    )
+                    # replay the entries left unacknowledged before reading new ones
+                    last_id = "0"
+                    time.sleep(BLOCK_MS / 1000)
+
+    def apply_batch(self, stream_key: str, entries: list) -> None:
+        """Apply a batch of entries in order, then acknowledge them together."""
+
+        entry_ids = []
+        for entry_id, fields in entries:
+            entry_ids.append(entry_id)
+            fields = {_decode(key): _decode(value) for key, value in (fields or {}).items()}
+            kind = fields.get("kind")
+
+            payload = {}
+            try:
+                payload = json.loads(fields["payload"])
+                STREAM_HANDLERS[kind](payload=payload)
+                frappe.db.commit()
+                increment("webhook_stream", kind=kind, stage="applied")
+            except Exception as e:
+                frappe.db.rollback()
+                # the status was not saved, check the next one against the DB
+                if payload.get("delivery_id"):
+                    forget_transition(payload["delivery_id"])
+                _dead_letter(stream_key, entry_id, fields, e)
+                increment("webhook_stream", kind=kind, stage="dead_lettered")
+
+        frappe.cache().xack(stream_key, CONSUMER_GROUP, *entry_ids)
+
+
+def _create_group(stream_key: str) -> None:
+    """Create the consumer group of a stream, and the stream, if missing."""
+
+    try:
+        frappe.cache().xgroup_create(stream_key, CONSUMER_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def _dead_letter(stream_key: str, entry_id, fields: dict, error: Exception) -> None:
+    """Copy a failed entry to the dead-letter stream."""
+
+    frappe.cache().xadd(
+        _get_dead_letter_key(),
+        {**fields, "stream": stream_key, "entry_id": _decode(entry_id), "error": str(error)[:1000]},
+        maxlen=DEAD_LETTER_MAXLEN,
+        approximate=True,
+    )
+    frappe.logger(module="frappe_uberdirect").warning(
+        f"Webhook {fields.get('kind')} entry {_decode(entry_id)} moved to the dead-letter stream: {error!s}"
+    )
+
+
+def run_stream_worker(partitions: list[int] | None = None, batch_size: int | None = None) -> None:
+    """Run the webhook stream worker in the foreground."""
+
+    batch_size = batch_size or frappe.conf.get("uberdirect_webhook_stream_batch_size") or DEFAULT_BATCH_SIZE
+    StreamWorker(partitions=partitions, batch_size=int(batch_size)).run()
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
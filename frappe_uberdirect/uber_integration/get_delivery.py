@@ -1,8 +1,7 @@
 """Background job getting a delivery for an order."""
 
-import requests
-
 import frappe
+from .client import get_client
 from .helper import prepare_url, prepare_auth_header
 
 
@@ -22,7 +21,7 @@ def get_delivery(delivery_id: str) -> dict:
     headers = prepare_auth_header().get("headers")
 
     # send request
-    response = requests.get(url, headers=headers, timeout=10)
+    response = get_client().get("get_delivery", url, headers=headers)
 
     # check response
     if response.status_code != 200:
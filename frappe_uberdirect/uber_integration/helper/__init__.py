@@ -7,5 +7,26 @@ from .prepare_auth_header import prepare_auth_header
 from .prepare_params import prepare_params
 from .prepare_url import prepare_url
 from .get_pickup_details import get_pickup_details
+from .pickup_context import get_pickup_context, invalidate_pickup_context
+from .delivery_lookup import (
+    cache_delivery_mapping,
+    forget_order_delivery,
+    get_delivery_id,
+    get_delivery_mapping,
+    get_delivery_name,
+)
 
-__all__ = ["get_pickup_address", "prepare_auth_header", "prepare_params", "prepare_url", "get_pickup_details"]
+__all__ = [
+    "get_pickup_address",
+    "prepare_auth_header",
+    "prepare_params",
+    "prepare_url",
+    "get_pickup_details",
+    "get_pickup_context",
+    "invalidate_pickup_context",
+    "cache_delivery_mapping",
+    "forget_order_delivery",
+    "get_delivery_id",
+    "get_delivery_mapping",
+    "get_delivery_name",
+]
@@ -0,0 +1,96 @@
+"""Helper functions mapping delivery IDs, order numbers and delivery names.
+
+The mapping between an ``ArcPOS Delivery``'s name, its Uber ``delivery_id``
+and its ``order_no`` never changes once the delivery is created, so it is
+cached in Redis and the DB is only queried on a cache miss. An order
+re-dispatched after a cancel has several deliveries; its ``order_no`` key
+points at the newest live one, is overwritten when a delivery is inserted
+and is dropped when the delivery is canceled. The lookup behind it skips
+canceled deliveries, so it only resolves to one while the order has no other
+delivery, e.g. to show that the delivery was canceled.
+"""
+
+import frappe
+
+# how long a delivery mapping is cached, in seconds
+MAPPING_TTL = 7 * 24 * 60 * 60
+
+MAPPING_FIELDS = ["name", "delivery_id", "order_no"]
+
+# statuses of a delivery that is no longer live
+CANCELED_STATUSES = ["canceled", "returned"]
+
+
+def _prepare_cache_key(field: str, value: str) -> str:
+    return f"uberdirect_delivery_by_{field}:{value}"
+
+
+def cache_delivery_mapping(name: str, delivery_id: str, order_no: str) -> dict:
+    """Cache the mapping of a delivery under each of its three keys.
+
+    Called on every insert, so the ``order_no`` key moves to the newest delivery.
+    """
+
+    mapping = {"name": name, "delivery_id": delivery_id, "order_no": order_no}
+    for field, value in mapping.items():
+        if value:
+            frappe.cache().set_value(_prepare_cache_key(field, value), mapping, expires_in_sec=MAPPING_TTL)
+
+    return mapping
+
+
+def forget_order_delivery(order_no: str) -> None:
+    """Drop the cached delivery of an order, e.g. once it is canceled."""
+    frappe.cache().delete_value(_prepare_cache_key("order_no", order_no))
+
+
+def get_delivery_mapping(name: str = None, delivery_id: str = None, order_no: str = None) -> dict | None:
+    """Get the ``name``, ``delivery_id`` and ``order_no`` of a delivery by any one of them.
+
+    Returns:
+        dict | None: The mapping, or None if there is no such delivery
+    """
+    lookup = {"name": name, "delivery_id": delivery_id, "order_no": order_no}
+    field, value = next(((field, value) for field, value in lookup.items() if value), (None, None))
+    if not field:
+        frappe.throw("A delivery name, delivery ID or order number is required")
+
+    # cached mapping
+    mapping = frappe.cache().get_value(_prepare_cache_key(field, value))
+    if mapping:
+        return mapping
+
+    # fall back to the indexed lookup and cache it
+    row = None
+    if field == "order_no":
+        # the newest delivery of the order that is still live
+        row = frappe.db.get_value(
+            "ArcPOS Delivery",
+            {"order_no": value, "status": ["not in", CANCELED_STATUSES]},
+            MAPPING_FIELDS,
+            as_dict=True,
+            order_by="creation desc",
+        )
+    if not row:
+        # a canceled delivery is only served while the order has no other one
+        row = frappe.db.get_value(
+            "ArcPOS Delivery", {field: value}, MAPPING_FIELDS, as_dict=True, order_by="creation desc"
+        )
+    if not row:
+        return None
+
+    return cache_delivery_mapping(row.name, row.delivery_id, row.order_no)
+
+
+def get_delivery_name(delivery_id: str) -> str | None:
+    """Get the ``ArcPOS Delivery`` name for an Uber delivery ID."""
+
+    mapping = get_delivery_mapping(delivery_id=delivery_id)
+    return mapping["name"] if mapping else None
+
+
+def get_delivery_id(order_no: str) -> str | None:
+    """Get the Uber delivery ID for an order number."""
+
+    mapping = get_delivery_mapping(order_no=order_no)
+    return mapping["delivery_id"] if mapping else None
@@ -0,0 +1,98 @@
+"""Pickup context provider for the Uber Direct integration.
+
+The pickup outlet (the default outlet from ArcPOS Settings and its Territory
+details) almost never changes, so it is built once and cached in Redis and
+in a per-worker cache. A version stamp in Redis invalidates both tiers when
+Territory or ArcPOS Settings is saved.
+"""
+
+import frappe
+
+CONTEXT_CACHE_KEY = "uberdirect_pickup_context"
+VERSION_CACHE_KEY = "uberdirect_pickup_context_version"
+
+# territory field for each pickup address field
+ADDRESS_FIELD_MAP = {
+    "custom_address_line1": "street_address",
+    "custom_city": "city",
+    "custom_state": "state",
+    "custom_pincode": "zip_code",
+    "custom_country": "country",
+}
+
+# per-worker cache, keyed by site
+_local_contexts = {}
+
+
+def get_pickup_context() -> dict:
+    """Get the pickup context of the default outlet.
+
+    Returns:
+        dict: ``outlet``, ``address``, ``name`` and ``phone_number`` of the
+        default outlet, plus the ``version`` it was built for
+    """
+    version = _get_version()
+
+    # per-worker tier
+    context = _local_contexts.get(frappe.local.site)
+    if context and context["version"] == version:
+        return context
+
+    # redis tier, rebuilt from the DB when missing or outdated
+    context = frappe.cache().get_value(CONTEXT_CACHE_KEY)
+    if not context or context["version"] != version:
+        context = _build_pickup_context(version)
+        frappe.cache().set_value(CONTEXT_CACHE_KEY, context)
+
+    _local_contexts[frappe.local.site] = context
+    return context
+
+
+def invalidate_pickup_context() -> None:
+    """Invalidate the cached pickup context once the current transaction commits."""
+
+    frappe.db.after_commit.add(_bump_version)
+
+
+def _bump_version() -> None:
+    cache = frappe.cache()
+    cache.incr(cache.make_key(VERSION_CACHE_KEY))
+    cache.delete_value(CONTEXT_CACHE_KEY)
+
+
+def _get_version() -> int:
+    cache = frappe.cache()
+    return int(cache.get(cache.make_key(VERSION_CACHE_KEY)) or 0)
+
+
+def _build_pickup_context(version: int) -> dict:
+    """Build the pickup context from ArcPOS Settings and the outlet Territory."""
+
+    # get arcpos settings
+    default_outlet = frappe.db.get_single_value("ArcPOS Settings", "default_outlet")
+    if not default_outlet:
+        frappe.throw("Default outlet is not set. Please set it in the ArcPOS Settings.")
+
+    # get the outlet
+    outlet = frappe.get_doc("Territory", default_outlet)
+    if not outlet:
+        message = "Default outlet is not found. Please set it in the ArcPOS Settings."
+        frappe.throw(message, exc=frappe.NotFound)
+
+    # prepare address
+    address = {value: outlet.get(field) for field, value in ADDRESS_FIELD_MAP.items()}
+
+    # get the primary contact number
+    phone_number = None
+    for contact in outlet.get("custom_contact_numbers", []):
+        if contact.is_primary_phone or contact.is_primary_mobile_no:
+            phone_number = contact.phone
+            break
+
+    return {
+        "version": version,
+        "outlet": default_outlet,
+        "address": address,
+        "name": outlet.custom_outlet_name,
+        "phone_number": phone_number,
+    }
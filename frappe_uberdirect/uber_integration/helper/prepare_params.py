@@ -1,16 +1,18 @@
 """Helper functions for preparing parameters."""
 
+from urllib.parse import urlencode
 
-def prepare_params(params: dict) -> str:
-    """Prepare the parameters for the Uber Direct integration."""
 
-    # prepare query string
-    qry_list = []
-    for key, value in params.items():
-        qry_list.append(f"{key}={value}")
+def prepare_params(params: dict) -> dict:
+    """Prepare the parameters for the Uber Direct integration.
+
+    Values are URL encoded and ``None`` values are left out. The query is
+    empty, without a ``?``, when there is nothing to send.
+    """
 
-    # join query string
-    query = "&".join(qry_list)
-    query = f"?{query}"
+    # prepare query string
+    query = urlencode({key: value for key, value in (params or {}).items() if value is not None})
+    if query:
+        query = f"?{query}"
 
     return {"query": query}
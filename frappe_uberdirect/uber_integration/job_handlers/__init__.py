@@ -1,3 +1,6 @@
 from .create_delivery import create_delivery_handler
+from .bulk_create_delivery import bulk_create_delivery_handler
+from .reconcile_deliveries import reconcile_deliveries
+from .rollup_delivery_sla import rollup_delivery_sla
 
-__all__ = ["create_delivery_handler"]
+__all__ = ["create_delivery_handler", "bulk_create_delivery_handler", "reconcile_deliveries", "rollup_delivery_sla"]
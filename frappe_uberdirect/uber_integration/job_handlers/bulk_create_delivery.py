@@ -0,0 +1,153 @@
+"""Bulk delivery creation with bounded parallelism.
+
+The pickup details and ArcPOS Settings are fetched once and shared by every
+invoice of the batch. Deliveries are then created concurrently, at most
+``uberdirect_bulk_delivery_concurrency`` at a time, and the progress of each
+invoice is tracked in Redis under a job handle. Invoices whose attempt failed
+or was deferred stay ``rescheduled`` until a later attempt creates the
+delivery or gives up, and the job reports ``retrying`` until then.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import frappe
+from frappe.utils import now
+from frappe_uberdirect.utils.site_context import site_context
+
+from ..helper import get_pickup_details
+from .create_delivery import create_delivery_handler, get_default_customers
+
+# default number of deliveries created at the same time
+DEFAULT_CONCURRENCY = 4
+
+# how long the progress of a bulk job is kept, in seconds
+PROGRESS_TTL = 24 * 60 * 60
+
+# invoice statuses that are not final
+UNFINISHED_STATUSES = ("pending", "running", "rescheduled")
+
+
+def _get_progress_keys(handle: str) -> tuple[str, str]:
+    """Get the job and per-invoice result keys of a bulk job."""
+    return f"uberdirect_bulk_delivery:{handle}", f"uberdirect_bulk_delivery_results:{handle}"
+
+
+def _set_result(handle: str, invoice_id: str, status: str, **details) -> None:
+    _, results_key = _get_progress_keys(handle)
+    frappe.cache().hset(results_key, invoice_id, {"status": status, **details})
+
+
+def start_bulk_delivery(invoice_ids: list[str]) -> str:
+    """Enqueue the creation of deliveries for several invoices.
+
+    Returns:
+        str: The job handle to pass to ``get_bulk_delivery_status``
+    """
+    handle = frappe.generate_hash(length=12)
+    job_key, results_key = _get_progress_keys(handle)
+
+    # record the job and mark every invoice pending
+    cache = frappe.cache()
+    job = {"status": "queued", "owner": frappe.session.user, "total": len(invoice_ids), "created": now()}
+    cache.set_value(job_key, job, expires_in_sec=PROGRESS_TTL)
+    for invoice_id in invoice_ids:
+        _set_result(handle, invoice_id, "pending")
+    cache.expire(cache.make_key(results_key), PROGRESS_TTL)
+
+    frappe.enqueue(
+        bulk_create_delivery_handler,
+        queue="long",
+        job_id=f"uberdirect_bulk_delivery_{handle}",
+        handle=handle,
+        invoice_ids=invoice_ids,
+    )
+    return handle
+
+
+def get_bulk_delivery_status(handle: str) -> dict | None:
+    """Get the progress and per-invoice results of a bulk job."""
+
+    job_key, results_key = _get_progress_keys(handle)
+    job = frappe.cache().get_value(job_key)
+    if not job:
+        return None
+
+    results = frappe.cache().hgetall(results_key)
+    unfinished = [result for result in results.values() if result["status"] in UNFINISHED_STATUSES]
+    if job["status"] == "completed" and unfinished:
+        # the batch ran, later attempts of some invoices are pending
+        job = {**job, "status": "retrying"}
+
+    return {**job, "job_id": handle, "finished": len(results) - len(unfinished), "results": results}
+
+
+def bulk_create_delivery_handler(handle: str, invoice_ids: list[str]) -> None:
+    """Create the deliveries of a bulk job concurrently."""
+
+    job_key, _ = _get_progress_keys(handle)
+    job = frappe.cache().get_value(job_key) or {}
+    frappe.cache().set_value(job_key, {**job, "status": "running"}, expires_in_sec=PROGRESS_TTL)
+
+    # prefetch what every invoice shares
+    prefetched = {
+        "pickup_details": get_pickup_details(),
+        "default_customers": get_default_customers(),
+    }
+
+    # create the deliveries with bounded parallelism
+    concurrency = int(frappe.conf.get("uberdirect_bulk_delivery_concurrency") or DEFAULT_CONCURRENCY)
+    site, sites_path, user = frappe.local.site, frappe.local.sites_path, frappe.session.user
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for invoice_id in invoice_ids:
+            executor.submit(_create_delivery, site, sites_path, user, handle, invoice_id, prefetched)
+
+    frappe.cache().set_value(job_key, {**job, "status": "completed", "finished": now()}, expires_in_sec=PROGRESS_TTL)
+    frappe.logger(module="frappe_uberdirect").info(f"Bulk delivery job {handle} completed for {len(invoice_ids)} invoices")
+
+
+def _create_delivery(site: str, sites_path: str, user: str, handle: str, invoice_id: str, prefetched: dict) -> None:
+    """Create one delivery of a bulk job in a worker thread."""
+
+    try:
+        with site_context(site, sites_path, user=user):
+            _set_result(handle, invoice_id, "running")
+            response = create_delivery_handler(invoice_id=invoice_id, prefetched=prefetched, bulk_handle=handle)
+
+            # failed attempts are rescheduled, deferred while Uber Direct is down
+            if response is None:
+                _set_result(handle, invoice_id, "rescheduled")
+                return
+
+            _set_result(
+                handle,
+                invoice_id,
+                "created",
+                delivery_id=response.get("id"),
+                tracking_url=response.get("tracking_url"),
+            )
+    except Exception as e:
+        with site_context(site, sites_path, connect=False):
+            _set_result(handle, invoice_id, "failed", error=str(e))
+
+
+def retry_bulk_delivery(bulk_handle: str, invoice_id: str, **kwargs) -> dict | None:
+    """Run a rescheduled or deferred attempt of a bulk job's delivery and record its result."""
+
+    try:
+        response = create_delivery_handler(invoice_id=invoice_id, bulk_handle=bulk_handle, **kwargs)
+    except Exception as e:
+        _set_result(bulk_handle, invoice_id, "failed", error=str(e))
+        raise
+
+    # rescheduled again, the next attempt records the result
+    if response is None:
+        return None
+
+    _set_result(
+        bulk_handle,
+        invoice_id,
+        "created",
+        delivery_id=response.get("id"),
+        tracking_url=response.get("tracking_url"),
+    )
+    return response
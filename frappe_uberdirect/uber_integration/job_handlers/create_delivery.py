@@ -1,12 +1,31 @@
 import json
-import time
+import random
 from datetime import timedelta
 
 import frappe
 from frappe.utils import get_datetime, now_datetime
 from excel_restaurant_pos.shared.contacts import get_customer_phones
-from ..helper import get_pickup_details
+from ..helper import cache_delivery_mapping, get_pickup_details
+from frappe_uberdirect.uber_integration.circuit_breaker import (
+    UberDirectCircuitOpenError,
+    get_circuit_fallback,
+)
 from frappe_uberdirect.uber_integration.create_delivery import create_delivery
+from frappe_uberdirect.uber_integration.delivery_snapshot import update_delivery_snapshot
+from frappe_uberdirect.uber_integration.lifecycle import DELIVERY_CREATED, record_lifecycle_event
+from frappe_uberdirect.uber_integration.quote_cache import QUOTE_EXPIRY_BUFFER
+from frappe_uberdirect.utils.background_jobs import enqueue_delayed
+
+# create delivery attempts and backoff between them
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 2
+RETRY_MAX_SECONDS = 300
+
+# times an invoice's delivery is deferred while the circuit is open before giving up
+DEFAULT_MAX_DEFERRALS = 20
+
+# runs the later attempts of a bulk job's delivery and records their result
+BULK_RETRY_METHOD = "frappe_uberdirect.uber_integration.job_handlers.bulk_create_delivery.retry_bulk_delivery"
 
 
 def _get_valid_quote_id(sales_invoice) -> str | None:
@@ -36,7 +55,7 @@ def _get_valid_quote_id(sales_invoice) -> str | None:
     current_dt = now_datetime()
 
     # Consider expired if past expiry or within 3 minutes of expiry time
-    buffer = timedelta(minutes=3)
+    buffer = QUOTE_EXPIRY_BUFFER
     if expires_dt and (expires_dt < current_dt or current_dt >= expires_dt - buffer):
         frappe.log_error(
             "Delivery Quote Expired",
@@ -48,8 +67,24 @@ def _get_valid_quote_id(sales_invoice) -> str | None:
     return quote_id
 
 
+def get_default_customers() -> list[str]:
+    """Get the default POS and website customers from the ArcPOS Settings."""
+
+    # get and validte default customer
+    default_customer = frappe.db.get_single_value("ArcPOS Settings", "customer")
+    d_website_customer = frappe.db.get_single_value(
+        "ArcPOS Settings", "default_customer_website"
+    )
+
+    if not default_customer or not d_website_customer:
+        msg = "Default customer is not set in the ArcPOS Settings."
+        frappe.throw(msg=msg, exc=frappe.ValidationError)
+
+    return [default_customer, d_website_customer]
+
+
 # prepare dropoff details
-def _prepare_dropoff_details(sales_invoice) -> dict:
+def _prepare_dropoff_details(sales_invoice, default_customers: list[str] | None = None) -> dict:
     """Prepare the dropoff details for the delivery."""
 
     # get default customer
@@ -67,18 +102,12 @@ def _prepare_dropoff_details(sales_invoice) -> dict:
     # prepare the dropoff details
     dropoff_details = {"address": dropoff_address, "name": None, "phone_number": None}
 
-    # get and validte default customer
-    default_customer = frappe.db.get_single_value("ArcPOS Settings", "customer")
-    d_website_customer = frappe.db.get_single_value(
-        "ArcPOS Settings", "default_customer_website"
-    )
-
-    if not default_customer or not d_website_customer:
-        msg = "Default customer is not set in the ArcPOS Settings."
-        frappe.throw(msg=msg, exc=frappe.ValidationError)
+    # get the default customers unless prefetched
+    if default_customers is None:
+        default_customers = get_default_customers()
 
     # if invoice create on behalf of default customer
-    if sales_invoice.customer in [default_customer, d_website_customer]:
+    if sales_invoice.customer in default_customers:
         # set customer details
         dropoff_details["name"] = getattr(sales_invoice, "custom_customer_full_name")
         dropoff_details["phone_number"] = getattr(sales_invoice, "custom_mobile_no")
@@ -113,8 +142,47 @@ def _update_invoice_fields(invoice_id: str, fields: dict) -> None:
         frappe.log_error("Uber Direct Create Delivery", msg)
 
 
-def create_delivery_handler(invoice_id: str, retry: bool = True) -> dict:
-    """Create a delivery for an order through the Uber Direct integration."""
+def _get_max_attempts() -> int:
+    """Get the number of create delivery attempts before giving up."""
+    return int(frappe.conf.get("uberdirect_create_delivery_max_attempts") or DEFAULT_MAX_ATTEMPTS)
+
+
+def _get_max_deferrals() -> int:
+    """Get the number of deferrals of a delivery while the circuit is open before giving up."""
+    return int(frappe.conf.get("uberdirect_create_delivery_max_deferrals") or DEFAULT_MAX_DEFERRALS)
+
+
+def _get_retry_delay(attempt: int) -> float:
+    """Get the jittered exponential backoff in seconds after a failed attempt."""
+
+    backoff = min(RETRY_BASE_SECONDS * 2 ** (attempt - 1), RETRY_MAX_SECONDS)
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+def create_delivery_handler(
+    invoice_id: str,
+    retry: bool = True,
+    attempt: int = 1,
+    prefetched: dict | None = None,
+    bulk_handle: str | None = None,
+    deferrals: int = 0,
+) -> dict | None:
+    """Create a delivery for an order through the Uber Direct integration.
+
+    Args:
+        invoice_id: Sales Invoice to create the delivery for
+        retry: Reschedule failed attempts with backoff instead of failing right away
+        attempt: Number of this attempt, starting at 1
+        prefetched: Shared ``pickup_details`` and ``default_customers`` when
+            creating many deliveries at once
+        bulk_handle: Handle of the bulk job the delivery belongs to, whose
+            progress the rescheduled and deferred attempts update
+        deferrals: Number of times the delivery was already deferred while the
+            circuit was open, counted across attempts
+
+    Returns:
+        dict | None: The Uber Direct response, or None if the attempt was rescheduled or deferred
+    """
 
     # environment
     is_development = frappe.conf.get("environment", None) == "development"
@@ -126,7 +194,8 @@ def create_delivery_handler(invoice_id: str, retry: bool = True) -> dict:
         frappe.throw(msg=msg, exc=frappe.ValidationError)
 
     # get the pickup address
-    pickup_details = get_pickup_details()
+    prefetched = prefetched or {}
+    pickup_details = prefetched.get("pickup_details") or get_pickup_details()
 
     # prepare manifest items
     fmt_items = []
@@ -140,7 +209,9 @@ def create_delivery_handler(invoice_id: str, retry: bool = True) -> dict:
         )
 
     # prepare the dropoff details
-    dropoff_details = _prepare_dropoff_details(sales_invoice=invoice)
+    dropoff_details = _prepare_dropoff_details(
+        sales_invoice=invoice, default_customers=prefetched.get("default_customers")
+    )
 
     # prepare the delivery payload
     delivery_payload = {
@@ -187,43 +258,76 @@ def create_delivery_handler(invoice_id: str, retry: bool = True) -> dict:
     if quote_id and retry:
         delivery_payload["quote_id"] = quote_id
 
-    # create the delivery (retry up to 3 times with exponential backoff)
-    max_retries = 3 if retry else 1
-    backoff_seconds = 2
-    response = None
-    last_error = None
+    # later attempts of a bulk job's delivery also record their result
+    retry_method = create_delivery_handler
+    retry_kwargs = {"deferrals": deferrals}
+    if bulk_handle:
+        retry_method = BULK_RETRY_METHOD
+        retry_kwargs["bulk_handle"] = bulk_handle
 
-    for attempt in range(max_retries):
-        try:
-            response = create_delivery(payload=delivery_payload)
-            break
-        except Exception as e:
-            last_error = e
-            is_last_attempt = attempt == max_retries - 1
-            action = (
-                "No more retries."
-                if is_last_attempt
-                else f"Retrying in {backoff_seconds}s."
-            )
-            frappe.log_error(
-                "Uber Direct Create Delivery",
-                f"Uber Direct API attempt {attempt + 1}/{max_retries} failed: {e}. {action}",
-            )
-
-            if is_last_attempt:
+    # create the delivery, failed attempts are rescheduled instead of sleeping
+    max_attempts = _get_max_attempts() if retry else 1
+    try:
+        response = create_delivery(payload=delivery_payload)
+    except Exception as e:
+        # Uber Direct is failing, defer the same attempt until the circuit may close,
+        # without the "defer" fallback an open circuit is a failed attempt
+        if isinstance(e, UberDirectCircuitOpenError) and get_circuit_fallback("create_delivery") == "defer":
+            if deferrals >= _get_max_deferrals():
+                frappe.log_error(
+                    "Uber Direct Create Delivery",
+                    f"Delivery creation for invoice {invoice.name} deferred {deferrals} times, "
+                    "circuit is still open. No more retries.",
+                )
                 _update_invoice_fields(
                     invoice_id=invoice.name,
-                    fields={
-                        "custom_delivery_partner_status": "Failed to Create Delivery"
-                    },
+                    fields={"custom_delivery_partner_status": "Failed to Create Delivery"},
                 )
-            else:
-                time.sleep(backoff_seconds)
-                backoff_seconds *= 2
+                raise
+
+            retry_kwargs["deferrals"] = deferrals + 1
+            enqueue_delayed(
+                retry_method,
+                delay=timedelta(seconds=max(e.retry_after, 1)),
+                queue="long",
+                invoice_id=invoice.name,
+                retry=retry,
+                attempt=attempt,
+                **retry_kwargs,
+            )
+            frappe.logger(module="frappe_uberdirect").info(
+                f"Delivery creation for invoice {invoice.name} deferred for {e.retry_after:.0f}s, circuit is open"
+            )
+            return None
+
+        is_last_attempt = attempt >= max_attempts
+        delay = None if is_last_attempt else _get_retry_delay(attempt)
+        action = "No more retries." if is_last_attempt else f"Retrying in {delay:.1f}s."
+        frappe.log_error(
+            "Uber Direct Create Delivery",
+            f"Uber Direct API attempt {attempt}/{max_attempts} failed: {e}. {action}",
+        )
 
-    # if no response, raise the last error
-    if response is None:
-        raise last_error
+        if is_last_attempt:
+            _update_invoice_fields(
+                invoice_id=invoice.name,
+                fields={"custom_delivery_partner_status": "Failed to Create Delivery"},
+            )
+            raise
+
+        # the idempotency key is derived from the invoice, so it is stable across attempts
+        enqueue_delayed(
+            retry_method,
+            delay=timedelta(seconds=delay),
+            queue="long",
+            job_id=f"delivery_{invoice.name}_attempt_{attempt + 1}",
+            deduplicate=True,
+            invoice_id=invoice.name,
+            retry=True,
+            attempt=attempt + 1,
+            **retry_kwargs,
+        )
+        return None
 
     # get nested courier data (handle None values)
     courier = response.get("courier") or {}
@@ -257,10 +361,27 @@ def create_delivery_handler(invoice_id: str, retry: bool = True) -> dict:
             {"doctype": "ArcPOS Delivery", **delivery_data}
         )
         delivery_record.insert(ignore_permissions=True)
+        cache_delivery_mapping(
+            name=delivery_record.name,
+            delivery_id=delivery_record.delivery_id,
+            order_no=delivery_record.order_no,
+        )
     except Exception as e:
         msg = f"Error creating delivery record for invoice {invoice.name}: {e}"
         frappe.log_error("Uber Direct Create Delivery", msg)
 
+    # record the step on the lifecycle timeline
+    record_lifecycle_event(invoice.name, DELIVERY_CREATED, delivery_id=response.get("id"))
+
+    # start the snapshot pushed to the order's clients
+    update_delivery_snapshot(
+        response.get("id"),
+        invoice.name,
+        delivery=response,
+        status=response.get("status"),
+        courier=courier,
+    )
+
     # update the tracking url to sales invoice
     _update_invoice_fields(
         invoice_id=invoice.name,
@@ -0,0 +1,195 @@
+"""Reconcile local deliveries with Uber Direct.
+
+Catches up on lost webhooks by paging through the deliveries created since a
+stored watermark and comparing each one with its ``ArcPOS Delivery`` row.
+Only real differences are written, grouped so that every set of identical
+changes costs one UPDATE. A status goes through the same monotonic state
+machine as the webhooks, so a page fetched before a later webhook never
+moves a delivery back. The watermark advances to the oldest delivery that
+is still in progress, so finished history is never scanned twice.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import frappe
+from frappe.utils import cstr, now
+from frappe_uberdirect.utils.metrics import increment
+
+from ..delivery_snapshot import update_delivery_snapshot
+from ..delivery_state import apply_transition
+from ..event_handlers.courier_update_handler import COURIER_FIELD_MAP, _has_changed
+from ..event_handlers.delivery_status_handler import ORDER_STATUS_MAP, set_invoice_status
+from ..list_deliveries import iter_deliveries
+
+WATERMARK_KEY = "uberdirect_reconcile_watermark"
+LAST_RUN_CACHE_KEY = "uberdirect_reconcile_last_run"
+
+# how far back the first run looks, in hours
+DEFAULT_LOOKBACK_HOURS = 24
+
+# number of deliveries compared per batch of local lookups
+BATCH_SIZE = 100
+
+# delivery statuses that never change again
+TERMINAL_STATUSES = ("delivered", "canceled", "returned")
+
+
+def reconcile_deliveries() -> dict | None:
+    """Compare deliveries created since the watermark with the local rows and fix drift.
+
+    Returns:
+        dict | None: The run summary, None if Uber Direct is not configured
+    """
+    if not frappe.conf.get("uberdirect_customer_id"):
+        return None
+
+    started = datetime.now(timezone.utc)
+    start_dt = get_watermark(started)
+
+    summary = {"start_dt": start_dt, "scanned": 0, "matched": 0, "missing": 0, "drifted": 0}
+    oldest_open = None
+
+    batch = []
+    for delivery in iter_deliveries(start_dt=start_dt, page_size=BATCH_SIZE):
+        batch.append(delivery)
+
+        # keep the watermark behind every delivery that can still change
+        if delivery.get("status") not in TERMINAL_STATUSES and delivery.get("created"):
+            oldest_open = min(oldest_open or delivery["created"], delivery["created"])
+
+        if len(batch) >= BATCH_SIZE:
+            _reconcile_batch(batch, summary)
+            batch = []
+
+    if batch:
+        _reconcile_batch(batch, summary)
+
+    # advance the watermark
+    set_watermark(oldest_open or _format_dt(started))
+
+    # record coverage and drift
+    for metric in ("scanned", "matched", "missing", "drifted"):
+        increment(f"reconcile_{metric}", summary[metric])
+
+    summary["finished"] = now()
+    frappe.cache().set_value(LAST_RUN_CACHE_KEY, summary)
+
+    coverage = summary["matched"] / summary["scanned"] if summary["scanned"] else 1.0
+    frappe.logger(module="frappe_uberdirect").info(
+        f"Reconciled {summary['scanned']} deliveries since {start_dt}: "
+        f"{coverage:.1%} found locally, {summary['drifted']} corrected"
+    )
+    return summary
+
+
+def _reconcile_batch(deliveries: list[dict], summary: dict) -> None:
+    """Compare a batch of remote deliveries with their local rows and apply the differences."""
+
+    fields = ["name", "delivery_id", "order_no", "status", *COURIER_FIELD_MAP.values()]
+    rows = frappe.get_all(
+        "ArcPOS Delivery",
+        filters={"delivery_id": ["in", [delivery["id"] for delivery in deliveries]]},
+        fields=fields,
+    )
+    rows = {row.delivery_id: row for row in rows}
+
+    # group identical changes so each group is one write
+    delivery_changes = {}
+    invoice_changes = {}
+    refreshed = []
+    for delivery in deliveries:
+        summary["scanned"] += 1
+        row = rows.get(delivery["id"])
+        if not row:
+            summary["missing"] += 1
+            continue
+
+        summary["matched"] += 1
+        changes = _get_changes(row, delivery)
+
+        # a status the webhooks already moved past is stale
+        status = changes.get("status")
+        if status and not apply_transition(row.delivery_id, row.name, status, delivery.get("updated")):
+            del changes["status"]
+            status = None
+
+        if not changes:
+            continue
+
+        summary["drifted"] += 1
+        delivery_changes.setdefault(tuple(sorted(changes.items())), []).append(row.name)
+        refreshed.append((row, delivery, status))
+
+        if status in ORDER_STATUS_MAP and row.order_no:
+            invoice_changes.setdefault(status, []).append(row.order_no)
+
+    if not delivery_changes:
+        return
+
+    # apply the delivery changes
+    modified = now()
+    delivery = frappe.qb.DocType("ArcPOS Delivery")
+    for changes, names in delivery_changes.items():
+        query = frappe.qb.update(delivery).set(delivery.modified, modified)
+        for field, value in changes:
+            query = query.set(delivery[field], value)
+        query.where(delivery.name.isin(names)).run()
+
+    # apply the invoice statuses
+    for status, invoice_ids in invoice_changes.items():
+        set_invoice_status(invoice_ids, status)
+
+    # the snapshots served to clients missed the same webhooks
+    for row, remote, status in refreshed:
+        update_delivery_snapshot(
+            row.delivery_id,
+            row.order_no,
+            delivery=remote,
+            status=status,
+            courier=remote.get("courier"),
+        )
+
+    frappe.db.commit()
+
+
+def _get_changes(row: dict, delivery: dict) -> dict:
+    """Get the local fields that differ from the remote delivery."""
+
+    changes = {}
+    if delivery.get("status") and cstr(row.status) != delivery["status"]:
+        changes["status"] = delivery["status"]
+
+    courier = delivery.get("courier") or {}
+    for key, field in COURIER_FIELD_MAP.items():
+        value = courier.get(key)
+        if value is None:
+            continue
+
+        if _has_changed(field, row.get(field), value):
+            changes[field] = value
+
+    return changes
+
+
+def get_watermark(now_dt: datetime = None) -> str:
+    """Get the ``start_dt`` of the next run, an RFC 3339 UTC timestamp."""
+
+    watermark = frappe.db.get_global(WATERMARK_KEY)
+    if watermark:
+        return watermark
+
+    lookback = int(frappe.conf.get("uberdirect_reconcile_lookback_hours") or DEFAULT_LOOKBACK_HOURS)
+    return _format_dt((now_dt or datetime.now(timezone.utc)) - timedelta(hours=lookback))
+
+
+def set_watermark(value: str) -> None:
+    frappe.db.set_global(WATERMARK_KEY, value)
+
+
+def get_last_run() -> dict | None:
+    """Get the summary of the last reconciliation run."""
+    return frappe.cache().get_value(LAST_RUN_CACHE_KEY)
+
+
+def _format_dt(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
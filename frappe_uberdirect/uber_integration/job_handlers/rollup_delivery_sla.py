@@ -0,0 +1,102 @@
+"""Hourly SLA rollups of the delivery lifecycle timeline.
+
+For every order delivered in an hour, the time spent in each stage is taken
+from its ``Delivery Lifecycle Event`` rows and the per-stage percentiles are
+stored as ``Delivery SLA Rollup`` rows, so slow stages can be spotted
+without querying the raw timeline.
+"""
+
+import math
+from datetime import datetime, timedelta
+
+import frappe
+from frappe.utils import get_datetime, now_datetime
+
+from ..lifecycle import (
+    COURIER_ASSIGNED,
+    DELIVERED,
+    DELIVERY_CREATED,
+    DROPOFF,
+    IN_KITCHEN,
+    PICKUP_COMPLETE,
+)
+
+# stage name with its start and end event
+STAGES = {
+    "Kitchen to Delivery Created": (IN_KITCHEN, DELIVERY_CREATED),
+    "Delivery Created to Courier Assigned": (DELIVERY_CREATED, COURIER_ASSIGNED),
+    "Courier Assigned to Pickup Complete": (COURIER_ASSIGNED, PICKUP_COMPLETE),
+    "Pickup Complete to Dropoff": (PICKUP_COMPLETE, DROPOFF),
+    "Dropoff to Delivered": (DROPOFF, DELIVERED),
+    "Kitchen to Door": (IN_KITCHEN, DELIVERED),
+}
+
+PERCENTILES = {"p50_seconds": 0.50, "p90_seconds": 0.90, "p95_seconds": 0.95, "p99_seconds": 0.99}
+
+
+def rollup_delivery_sla(hour: str | datetime = None) -> list[dict]:
+    """Roll up the stage timings of the orders delivered in an hour.
+
+    Args:
+        hour: Any time within the hour, defaults to the previous full hour
+
+    Returns:
+        list[dict]: The rollup of each stage with at least one order
+    """
+    start = get_datetime(hour) if hour else now_datetime() - timedelta(hours=1)
+    start = start.replace(minute=0, second=0, microsecond=0)
+    end = start + timedelta(hours=1)
+
+    # orders completed in the hour
+    order_nos = frappe.get_all(
+        "Delivery Lifecycle Event",
+        filters={"event": DELIVERED, "event_time": ["between", [start, end - timedelta(microseconds=1)]]},
+        pluck="order_no",
+    )
+
+    # their full timeline, the latest delivery's step wins for re-dispatched orders
+    timelines = {}
+    if order_nos:
+        events = frappe.get_all(
+            "Delivery Lifecycle Event",
+            filters={"order_no": ["in", order_nos]},
+            fields=["order_no", "event", "event_time"],
+            order_by="event_time asc",
+        )
+        for event in events:
+            timelines.setdefault(event.order_no, {})[event.event] = get_datetime(event.event_time)
+
+    # durations of each stage
+    durations = {stage: [] for stage in STAGES}
+    for timeline in timelines.values():
+        for stage, (start_event, end_event) in STAGES.items():
+            if start_event in timeline and end_event in timeline:
+                durations[stage].append(max((timeline[end_event] - timeline[start_event]).total_seconds(), 0))
+
+    # replace the rollup of the hour, so reruns are idempotent
+    frappe.db.delete("Delivery SLA Rollup", {"hour": start})
+    rollups = []
+    for stage, values in durations.items():
+        if not values:
+            continue
+
+        values.sort()
+        rollup = {
+            "hour": start,
+            "stage": stage,
+            "orders": len(values),
+            **{field: _percentile(values, percentile) for field, percentile in PERCENTILES.items()},
+            "max_seconds": values[-1],
+        }
+        frappe.get_doc({"doctype": "Delivery SLA Rollup", **rollup}).insert(ignore_permissions=True)
+        rollups.append(rollup)
+
+    frappe.logger(module="frappe_uberdirect").info(
+        f"Rolled up delivery SLA for {len(timelines)} orders delivered at {start}"
+    )
+    return rollups
+
+
+def _percentile(ordered: list[float], percentile: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    return ordered[min(max(math.ceil(len(ordered) * percentile) - 1, 0), len(ordered) - 1)]
@@ -0,0 +1,82 @@
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests import IntegrationTestCase
+
+from frappe_uberdirect.uber_integration.delivery_state import apply_transition, forget_transition
+from frappe_uberdirect.uber_integration.job_handlers.reconcile_deliveries import _reconcile_batch
+
+MODULE = "frappe_uberdirect.uber_integration.job_handlers.reconcile_deliveries"
+
+DELIVERY_ID = "del_test_reconcile"
+DELIVERY_NAME = "test-reconcile-delivery"
+ORDER_NO = "test-reconcile-invoice"
+
+
+def _make_row(status: str, **courier) -> frappe._dict:
+    return frappe._dict(name=DELIVERY_NAME, delivery_id=DELIVERY_ID, order_no=ORDER_NO, status=status, **courier)
+
+
+@patch(f"{MODULE}.update_delivery_snapshot")
+@patch(f"{MODULE}.set_invoice_status")
+class IntegrationTestReconcileDeliveries(IntegrationTestCase):
+    def setUp(self):
+        forget_transition(DELIVERY_ID)
+
+        # record the UPDATEs as (field, value) pairs, besides ``modified``
+        self.qb = MagicMock()
+        self.qb.DocType.return_value.__getitem__.side_effect = lambda field: field
+        qb_patcher = patch.object(frappe, "qb", self.qb)
+        qb_patcher.start()
+        self.addCleanup(qb_patcher.stop)
+
+    def tearDown(self):
+        forget_transition(DELIVERY_ID)
+
+    def _reconcile(self, row: frappe._dict, remote: dict) -> dict:
+        summary = {"scanned": 0, "matched": 0, "missing": 0, "drifted": 0}
+        with patch.object(frappe, "get_all", return_value=[row]), patch.object(frappe.db, "commit"):
+            _reconcile_batch([{"id": DELIVERY_ID, **remote}], summary)
+        return summary
+
+    def _get_written_fields(self) -> dict:
+        return {
+            call.args[0]: call.args[1]
+            for call in self.qb.mock_calls
+            if call[0].endswith(".set") and isinstance(call.args[0], str)
+        }
+
+    def test_stale_page_after_terminal_webhook_is_dropped(self, set_invoice_status, update_snapshot):
+        # the delivered webhook is applied before the page fetched earlier is reconciled
+        self.assertTrue(apply_transition(DELIVERY_ID, DELIVERY_NAME, "delivered", "2026-10-18T12:05:00Z"))
+
+        summary = self._reconcile(_make_row("delivered"), {"status": "pickup", "updated": "2026-10-18T12:00:00Z"})
+
+        self.assertEqual(summary["drifted"], 0)
+        self.assertEqual(self._get_written_fields(), {})
+        set_invoice_status.assert_not_called()
+        update_snapshot.assert_not_called()
+
+    def test_stale_page_still_corrects_the_courier(self, set_invoice_status, update_snapshot):
+        self.assertTrue(apply_transition(DELIVERY_ID, DELIVERY_NAME, "canceled", "2026-10-18T12:05:00Z"))
+
+        summary = self._reconcile(
+            _make_row("canceled"),
+            {"status": "dropoff", "updated": "2026-10-18T12:00:00Z", "courier": {"name": "Sam"}},
+        )
+
+        self.assertEqual(summary["drifted"], 1)
+        self.assertEqual(self._get_written_fields(), {"courier_name": "Sam"})
+        set_invoice_status.assert_not_called()
+        self.assertIsNone(update_snapshot.call_args.kwargs["status"])
+
+    def test_missed_forward_status_is_applied(self, set_invoice_status, update_snapshot):
+        summary = self._reconcile(_make_row("pickup"), {"status": "delivered", "updated": "2026-10-18T12:05:00Z"})
+
+        self.assertEqual(summary["drifted"], 1)
+        self.assertEqual(self._get_written_fields(), {"status": "delivered"})
+        set_invoice_status.assert_called_once_with([ORDER_NO], "delivered")
+        self.assertEqual(update_snapshot.call_args.kwargs["status"], "delivered")
+
+        # a later stale page is checked against the reconciled status
+        self.assertFalse(apply_transition(DELIVERY_ID, DELIVERY_NAME, "pickup", "2026-10-18T12:00:00Z"))
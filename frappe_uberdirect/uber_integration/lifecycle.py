@@ -0,0 +1,96 @@
+"""Delivery lifecycle timeline.
+
+Each step of an order's way from the kitchen to the door is recorded once as
+an append-only ``Delivery Lifecycle Event``. Redeliveries of the same step,
+e.g. a repeated webhook, are dropped with a Redis ``SET NX`` before anything
+is written. Steps after the delivery is created are keyed by delivery too,
+so a delivery re-dispatched for the same order records its own steps. The
+guard is released if the transaction recording the step rolls back.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import frappe
+from frappe.utils import now_datetime
+
+IN_KITCHEN = "In kitchen"
+DELIVERY_CREATED = "Delivery Created"
+COURIER_ASSIGNED = "Courier Assigned"
+PICKUP_COMPLETE = "Pickup Complete"
+DROPOFF = "Dropoff"
+DELIVERED = "Delivered"
+
+# lifecycle event for each delivery status
+STATUS_EVENTS = {
+    "pickup": COURIER_ASSIGNED,
+    "pickup_complete": PICKUP_COMPLETE,
+    "dropoff": DROPOFF,
+    "delivered": DELIVERED,
+}
+
+# how long a recorded step is remembered for dropping repeats, in seconds
+RECORDED_TTL = 2 * 24 * 60 * 60
+
+
+def record_lifecycle_event(
+    order_no: str, event: str, delivery_id: str = None, received_at: float = None
+) -> bool:
+    """Record a lifecycle step of an order, once.
+
+    Args:
+        order_no: Sales Invoice of the order
+        event: One of the lifecycle events, e.g. ``DELIVERED``
+        delivery_id: Uber delivery ID, once the delivery exists
+        received_at: Unix time the step was observed, e.g. the webhook's
+            ``_received_at``; defaults to now
+
+    Returns:
+        bool: Whether the event was recorded, False for a repeat
+    """
+    if not order_no:
+        return False
+
+    recorded_key = _get_recorded_key(order_no, event, delivery_id)
+    if not frappe.cache().set(recorded_key, 1, nx=True, ex=RECORDED_TTL):
+        return False
+
+    # the row is gone if the transaction rolls back, so the step must be recordable again
+    frappe.db.after_rollback.add(lambda: frappe.cache().delete(recorded_key))
+
+    try:
+        frappe.get_doc(
+            {
+                "doctype": "Delivery Lifecycle Event",
+                "order_no": order_no,
+                "delivery_id": delivery_id,
+                "event": event,
+                "event_time": _get_event_time(received_at),
+            }
+        ).insert(ignore_permissions=True)
+    except Exception as e:
+        # the timeline must never break the step it records
+        frappe.cache().delete(recorded_key)
+        frappe.logger(module="frappe_uberdirect").warning(
+            f"Failed to record lifecycle event {event} for order {order_no}: {e!s}"
+        )
+        return False
+
+    return True
+
+
+def _get_recorded_key(order_no: str, event: str, delivery_id: str | None) -> str:
+    """Get the key remembering a recorded step, per delivery once it exists."""
+
+    if delivery_id:
+        return frappe.cache().make_key(f"uberdirect_lifecycle:{order_no}:{delivery_id}:{event}")
+    return frappe.cache().make_key(f"uberdirect_lifecycle:{order_no}:{event}")
+
+
+def _get_event_time(received_at: float | None) -> datetime:
+    """Get the event time in the system time zone."""
+
+    event_time = now_datetime()
+    if received_at:
+        event_time -= timedelta(seconds=max(time.time() - float(received_at), 0))
+    return event_time
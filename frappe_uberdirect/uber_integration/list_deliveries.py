@@ -1,13 +1,17 @@
 """Background job listing all deliveries."""
 
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
 
 import frappe
+from frappe_uberdirect.utils.site_context import site_context
+
+from .client import get_client
 from .helper import prepare_params, prepare_url, prepare_auth_header
 
 
-def list_deliveries(params: dict = None) -> list[dict]:
-    """List all deliveries."""
+def list_deliveries(params: dict = None) -> dict:
+    """List one page of deliveries."""
 
     # get customer id
     customer_id = frappe.conf.get("uberdirect_customer_id")
@@ -23,7 +27,7 @@ def list_deliveries(params: dict = None) -> list[dict]:
     headers = prepare_auth_header().get("headers")
 
     # send request
-    response = requests.get(url, headers=headers, timeout=10)
+    response = get_client().get("list_deliveries", url, headers=headers)
 
     # check response
     if response.status_code != 200:
@@ -32,3 +36,69 @@ def list_deliveries(params: dict = None) -> list[dict]:
 
     # return response
     return response.json()
+
+
+def iter_deliveries(filter: str = None, start_dt: str = None, end_dt: str = None, page_size: int = 100):
+    """Iterate over deliveries page by page without loading the whole history.
+
+    Follows the ``next_href`` of each page, which carries the cursor or offset
+    of the next one, and falls back to offset paging when it has none. The
+    next page is fetched in a background thread while the caller processes
+    the current one, so at most two pages are held in memory.
+
+    Args:
+        filter: Delivery status filter, e.g. ``ongoing``
+        start_dt: Only deliveries created at or after this RFC 3339 time
+        end_dt: Only deliveries created before this RFC 3339 time
+        page_size: Number of deliveries fetched per request
+
+    Yields:
+        dict: One delivery at a time
+    """
+    params = {"filter": filter, "start_dt": start_dt, "end_dt": end_dt, "limit": page_size, "offset": 0}
+    params = {key: value for key, value in params.items() if value is not None}
+
+    site, sites_path = frappe.local.site, frappe.local.sites_path
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="uberdirect_list_deliveries")
+    try:
+        page = list_deliveries(params=params)
+        while True:
+            deliveries = page.get("data") or []
+            next_params = _get_next_params(page, params, len(deliveries))
+
+            # fetch the next page ahead while the current one is consumed
+            next_page = next_params and executor.submit(_fetch_page, site, sites_path, next_params)
+
+            yield from deliveries
+
+            if not next_page:
+                return
+            page, params = next_page.result(), next_params
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _get_next_params(page: dict, params: dict, count: int) -> dict | None:
+    """Get the params of the page after ``page``, None on the last page.
+
+    Uber can return short pages before the last one, so only a missing
+    ``next_href`` (or an empty page) ends the iteration.
+    """
+
+    next_href = page.get("next_href")
+    if not next_href or not count:
+        return None
+
+    # the cursor or offset of the next page
+    next_params = dict(parse_qsl(urlsplit(next_href).query))
+    if next_params:
+        return {**params, **next_params}
+
+    return {**params, "offset": int(params.get("offset") or 0) + count}
+
+
+def _fetch_page(site: str, sites_path: str, params: dict) -> dict:
+    """Fetch a page of deliveries in the prefetch thread."""
+
+    with site_context(site, sites_path, connect=False):
+        return list_deliveries(params=params)
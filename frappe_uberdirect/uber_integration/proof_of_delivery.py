@@ -1,8 +1,7 @@
 """Background job proofing of delivery."""
 
-import requests
-
 import frappe
+from .client import get_client
 from .helper import prepare_url, prepare_auth_header
 
 
@@ -24,7 +23,7 @@ def proof_of_delivery(delivery_id: str, payload: dict = None) -> dict:
     headers = prepare_auth_header().get("headers")
 
     # send request
-    response = requests.post(url, headers=headers, json=payload, timeout=10)
+    response = get_client().post("proof_of_delivery", url, headers=headers, json=payload)
 
     # check response
     if response.status_code != 200:
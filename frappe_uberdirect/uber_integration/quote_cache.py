@@ -0,0 +1,149 @@
+"""Quote cache in front of the Uber Direct ``delivery_quotes`` call.
+
+Quotes are cached on the normalized pickup and dropoff addresses, the
+delivery window (floored to a time bucket) and the ``manifest_total_value``
+band. Each entry lives until the quote's ``expires`` time minus the same
+expiry buffer that delivery creation enforces, so a cached quote is never
+served once delivery creation would reject it.
+"""
+
+import hashlib
+import json
+import math
+import re
+from datetime import datetime, timedelta, timezone
+
+import frappe
+from frappe_uberdirect.utils.metrics import increment
+
+from .create_quote import create_quote
+
+# quotes this close to expiry are treated as expired
+QUOTE_EXPIRY_BUFFER = timedelta(minutes=3)
+
+# default width of a manifest_total_value band in cents
+DEFAULT_VALUE_BAND = 1000
+
+# default width of a delivery window time bucket in minutes
+DEFAULT_TIME_BUCKET = 5
+
+WINDOW_FIELDS = ["pickup_ready_dt", "pickup_deadline_dt", "dropoff_ready_dt", "dropoff_deadline_dt"]
+
+
+def create_quote_cached(payload: dict) -> dict:
+    """Create a quote, serving a cached quote for an equivalent request."""
+
+    cache_key = prepare_quote_cache_key(payload)
+    if not cache_key:
+        # the request cannot be normalized, let Uber Direct validate it
+        increment("quote_cache", result="uncacheable")
+        return create_quote(payload=payload)
+
+    # serve a cached quote that is still outside the expiry buffer
+    quote = frappe.cache().get_value(cache_key)
+    if quote and get_quote_ttl(quote) > 0:
+        increment("quote_cache", result="hit")
+        return quote
+
+    increment("quote_cache", result="miss")
+    quote = create_quote(payload=payload)
+
+    # cache until the quote enters the expiry buffer
+    ttl = get_quote_ttl(quote)
+    if ttl > 0:
+        frappe.cache().set_value(cache_key, quote, expires_in_sec=ttl)
+
+    return quote
+
+
+def get_fallback_quote(payload: dict) -> dict | None:
+    """Get a quote without calling Uber Direct.
+
+    Returns the cached quote for an equivalent request, or None if there is
+    none that is still valid.
+    """
+    cache_key = prepare_quote_cache_key(payload)
+    quote = frappe.cache().get_value(cache_key) if cache_key else None
+    if quote and get_quote_ttl(quote) > 0:
+        return quote
+
+    return None
+
+
+def get_quote_ttl(quote: dict) -> int:
+    """Get the seconds until the quote enters the expiry buffer, 0 if ``expires`` is missing or malformed."""
+
+    expires = quote.get("expires")
+    if not expires:
+        return 0
+
+    try:
+        expires_dt = datetime.fromisoformat(str(expires).replace("Z", "+00:00"))
+    except ValueError:
+        # returned to the caller but never cached
+        return 0
+
+    if expires_dt.tzinfo is None:
+        expires_dt = expires_dt.replace(tzinfo=timezone.utc)
+
+    remaining = expires_dt - QUOTE_EXPIRY_BUFFER - datetime.now(timezone.utc)
+    return int(remaining.total_seconds())
+
+
+def prepare_quote_cache_key(payload: dict) -> str | None:
+    """Prepare the cache key for a quote payload, None if a field is malformed."""
+
+    try:
+        normalized = {
+            "pickup": _normalize_address(payload.get("pickup_address")),
+            "dropoff": _normalize_address(payload.get("dropoff_address")),
+            "window": {field: _bucket_datetime(payload.get(field)) for field in WINDOW_FIELDS},
+            "value_band": _get_value_band(payload.get("manifest_total_value")),
+        }
+    except (ValueError, OverflowError):
+        return None
+
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    return f"uberdirect_quote_{digest}"
+
+
+def _normalize_address(address) -> dict:
+    """Normalize an address dict (or its JSON string) for comparison."""
+
+    if not address:
+        return {}
+    if isinstance(address, str):
+        address = json.loads(address)
+
+    normalized = {}
+    for field, value in address.items():
+        value = re.sub(r"[^\w\s]", " ", str(value or "").lower())
+        normalized[field] = " ".join(value.split())
+
+    return normalized
+
+
+def _bucket_datetime(value) -> str | None:
+    """Floor a delivery window datetime to its time bucket."""
+
+    if not value:
+        return None
+
+    bucket = int(frappe.conf.get("uberdirect_quote_cache_time_bucket") or DEFAULT_TIME_BUCKET)
+    value_dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    value_dt = value_dt.replace(minute=value_dt.minute - value_dt.minute % bucket, second=0, microsecond=0)
+    return value_dt.isoformat()
+
+
+def _get_value_band(value) -> int | None:
+    """Get the manifest_total_value band of a value in cents."""
+
+    if value in (None, ""):
+        return None
+
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"manifest_total_value {value} is not finite")
+
+    band = int(frappe.conf.get("uberdirect_quote_cache_value_band") or DEFAULT_VALUE_BAND)
+    return int(value) // band
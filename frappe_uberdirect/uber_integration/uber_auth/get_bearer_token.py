@@ -2,10 +2,29 @@
 
 This module handles authentication with the Uber Direct API to retrieve
 bearer tokens for API requests.
+
+Tokens are kept in two tiers: a process-local memory tier in front of the
+Redis cache. Only one worker refreshes a token at a time (guarded by a Redis
+lock) while the others wait for its result, and tokens are refreshed in the
+background a safety margin before they expire.
 """
 
-import requests
+import time
+
 import frappe
+from redis.exceptions import LockError
+
+from ..client import get_client
+
+# refresh tokens this many seconds before they expire
+DEFAULT_REFRESH_MARGIN = 300
+
+# how long a refresh may hold the lock, and how long others wait for it
+REFRESH_LOCK_TIMEOUT = 30
+REFRESH_WAIT_TIMEOUT = 15
+
+# process-local token tier, keyed by site and cache key
+_local_tokens = {}
 
 
 def get_bearer_token():
@@ -13,11 +32,79 @@ def get_bearer_token():
 
     This function retrieves a bearer token from the Uber Direct API using the
     client ID and client secret configured in the Frappe site configuration.
+    Cached tokens are served from memory or Redis, and a background refresh is
+    scheduled when the token is inside the refresh margin.
+    """
+    customer_id = frappe.conf.get("uberdirect_customer_id")
+
+    token = _get_cached_token(customer_id)
+    if not token:
+        return refresh_bearer_token()
+
+    # refresh in the background before the token expires
+    if token["expires_at"] - time.time() <= _get_refresh_margin():
+        _schedule_refresh(customer_id)
+
+    return token["access_token"]
+
+
+def refresh_bearer_token(force: bool = False):
+    """Refresh the bearer token, letting only one worker fetch it at a time.
+
+    Workers that do not get the lock wait for the refreshing worker and then
+    read its result from Redis.
+
+    Args:
+        force: Fetch a new token even if the cached one is outside the refresh margin
     """
+    customer_id = frappe.conf.get("uberdirect_customer_id")
+    lock = frappe.cache().lock(
+        _prepare_lock_name(customer_id),
+        timeout=REFRESH_LOCK_TIMEOUT,
+        blocking_timeout=REFRESH_WAIT_TIMEOUT,
+    )
+
+    acquired = lock.acquire()
+    try:
+        # another worker may have refreshed while we waited
+        token = get_bearer_token_from_cache(customer_id)
+        if token and not force and not _needs_refresh(token):
+            _local_tokens[_prepare_local_key(customer_id)] = token
+            return token["access_token"]
+
+        # the refreshing worker took too long, serve its last token if still valid
+        if not acquired and token and token["expires_at"] > time.time():
+            return token["access_token"]
+
+        return _fetch_bearer_token(customer_id)
+    finally:
+        if acquired:
+            try:
+                lock.release()
+            except LockError:
+                # lock expired while fetching, nothing to release
+                pass
+
+
+def refresh_bearer_token_if_due():
+    """Scheduled task that refreshes the token a safety margin before it expires."""
+
+    if not frappe.conf.get("uberdirect_customer_id") or not frappe.conf.get("uberdirect_client_id"):
+        return
+
+    token = get_bearer_token_from_cache(frappe.conf.get("uberdirect_customer_id"))
+    if token and not _needs_refresh(token):
+        return
+
+    refresh_bearer_token()
+
+
+def _fetch_bearer_token(customer_id: str):
+    """Fetch a new bearer token from the Uber Direct API and cache it."""
+
     url = frappe.conf.get("uberdirect_oauth_url")
     client_id = frappe.conf.get("uberdirect_client_id")
     client_secret = frappe.conf.get("uberdirect_client_secret")
-    customer_id = frappe.conf.get("uberdirect_customer_id")
 
     url = f"{url}/oauth/v2/token"
 
@@ -30,43 +117,85 @@ def get_bearer_token():
 
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
-    bearer_token = get_bearer_token_from_cache(customer_id)
-
-    if bearer_token:
-        return bearer_token
-
     # Use data=payload for form-urlencoded, requests will encode it automatically
-    response = requests.post(url, headers=headers, data=payload, timeout=30)
+    response = get_client().post("oauth_token", url, headers=headers, data=payload)
     if response.status_code != 200:
         frappe.throw(f"Failed to get bearer token: {response.text}")
 
-    print(response.text)
-
     bearer_token = response.json()["access_token"]
     expires_in = response.json()["expires_in"]
 
-    print(f"Bearer token: {bearer_token}")
-    print(f"Expires in: {expires_in} seconds")
+    frappe.logger(module="frappe_uberdirect").info(f"Bearer token refreshed, expires in {expires_in} seconds")
 
     put_bearer_token_in_cache(customer_id, bearer_token, expires_in)
     return bearer_token
 
 
-def get_bearer_token_from_cache(customer_id: str):
+def _get_cached_token(customer_id: str) -> dict | None:
+    """Get a valid token from the memory tier, falling back to Redis."""
+
+    local_key = _prepare_local_key(customer_id)
+    now = time.time()
+
+    # memory tier, only trusted outside the refresh margin
+    token = _local_tokens.get(local_key)
+    if token and token["expires_at"] - now > _get_refresh_margin():
+        return token
+
+    # redis tier
+    token = get_bearer_token_from_cache(customer_id)
+    if not token or token["expires_at"] <= now:
+        _local_tokens.pop(local_key, None)
+        return None
+
+    _local_tokens[local_key] = token
+    return token
+
+
+def _needs_refresh(token: dict) -> bool:
+    return token["expires_at"] - time.time() <= _get_refresh_margin()
+
+
+def _schedule_refresh(customer_id: str) -> None:
+    """Enqueue a single background refresh for the customer's token."""
+
+    frappe.enqueue(
+        "frappe_uberdirect.uber_integration.uber_auth.get_bearer_token.refresh_bearer_token",
+        queue="short",
+        job_id=f"uberdirect_token_refresh_{customer_id}",
+        deduplicate=True,
+    )
+
+
+def _get_refresh_margin() -> int:
+    return int(frappe.conf.get("uberdirect_token_refresh_margin") or DEFAULT_REFRESH_MARGIN)
+
+
+def _is_shared() -> bool:
+    """Whether sites with the same customer ID share one token."""
+    return bool(frappe.conf.get("uberdirect_share_bearer_token"))
+
+
+def get_bearer_token_from_cache(customer_id: str) -> dict | None:
     """Get a bearer token from the cache.
 
-    This function retrieves a bearer token from the cache using the
-    client ID and client secret configured in the Frappe site configuration.
+    Returns a dict with ``access_token`` and ``expires_at`` (unix time), or
+    None if there is no cached token.
     """
     cache_key = prepare_cache_key(customer_id)
-    return frappe.cache().get_value(cache_key)
+    token = frappe.cache().get_value(cache_key, shared=_is_shared())
+
+    # tokens cached before expiry tracking are refreshed once
+    if not isinstance(token, dict):
+        return None
+
+    return token
 
 
 def put_bearer_token_in_cache(customer_id: str, bearer_token: str, expires_in: int):
     """Put a bearer token in the cache.
 
-    This function puts a bearer token in the cache using the
-    client ID and client secret configured in the Frappe site configuration.
+    This function puts a bearer token in both the Redis and memory tiers.
 
     Args:
         customer_id: Customer ID for cache key
@@ -75,13 +204,35 @@ def put_bearer_token_in_cache(customer_id: str, bearer_token: str, expires_in: i
     """
     cache_key = prepare_cache_key(customer_id)
     expires_in_seconds = int(expires_in)
-    frappe.cache().set_value(cache_key, bearer_token, expires_in_sec=expires_in_seconds)
+    token = {"access_token": bearer_token, "expires_at": time.time() + expires_in_seconds}
+
+    frappe.cache().set_value(cache_key, token, expires_in_sec=expires_in_seconds, shared=_is_shared())
+    _local_tokens[_prepare_local_key(customer_id)] = token
 
 
 def prepare_cache_key(customer_id: str):
     """Prepare a cache key for the bearer token.
 
-    This function prepares a cache key for the bearer token using the
-    client ID and client secret configured in the Frappe site configuration.
+    The key only depends on the customer ID, so sites sharing the token
+    (``uberdirect_share_bearer_token``) resolve to the same entry.
     """
     return f"uberdirect_bearer_token_{customer_id}"
+
+
+def _prepare_local_key(customer_id: str) -> tuple[str, str]:
+    """Prepare the memory tier key of a token.
+
+    The key includes the site, so a worker serving several sites never hands
+    one site's token to another.
+    """
+    return (frappe.local.site, prepare_cache_key(customer_id))
+
+
+def _prepare_lock_name(customer_id: str) -> str:
+    """Prepare the Redis lock name guarding token refreshes."""
+
+    lock_key = f"uberdirect_bearer_token_lock_{customer_id}"
+    if _is_shared():
+        return lock_key
+
+    return frappe.cache().make_key(lock_key)
@@ -7,12 +7,35 @@ import frappe
 from frappe.utils.background_jobs import (
     RQ_JOB_FAILURE_TTL,
     RQ_RESULTS_TTL,
+    create_job_id,
     get_queue,
     get_queues_timeout,
+    get_redis_conn,
     truncate_failed_registry,
 )
 from rq import Callback
-from rq.job import Job
+from rq.exceptions import NoSuchJobError
+from rq.job import Job, JobStatus
+
+from .promoter import notify_promoter
+
+# statuses of a job that has not finished yet
+PENDING_STATUSES = (JobStatus.SCHEDULED, JobStatus.DEFERRED, JobStatus.QUEUED, JobStatus.STARTED)
+
+
+def get_pending_job(job_id: str) -> Job | None:
+    """Get the job with this ID if it is scheduled, queued or running.
+
+    Args:
+        job_id: Job ID as passed to ``enqueue_delayed`` or ``frappe.enqueue``,
+            without the site prefix
+    """
+    try:
+        job = Job.fetch(create_job_id(job_id), connection=get_redis_conn())
+    except NoSuchJobError:
+        return None
+
+    return job if job.get_status(refresh=False) in PENDING_STATUSES else None
 
 
 def enqueue_delayed(
@@ -21,6 +44,7 @@ def enqueue_delayed(
     queue: str = "default",
     timeout: int | None = None,
     job_id: str | None = None,
+    deduplicate: bool = False,
     **kwargs,
 ) -> Job:
     """
@@ -34,11 +58,13 @@ def enqueue_delayed(
         delay: TimeDelta object specifying how long to delay execution
         queue: Queue name (default, short, or long). Defaults to "default"
         timeout: Job timeout in seconds. If None, uses queue default
-        job_id: Optional unique job ID for deduplication
+        job_id: Optional deterministic job ID, prefixed with the site like ``frappe.enqueue`` does
+        deduplicate: Skip enqueueing if a job with ``job_id`` is already
+            scheduled, queued or running, and return that job instead
         **kwargs: Keyword arguments to pass to the method
 
     Returns:
-        Job: The enqueued RQ job object
+        Job: The enqueued RQ job object, or the pending one when deduplicated
 
     Example:
         ```python
@@ -54,6 +80,15 @@ def enqueue_delayed(
         )
         ```
     """
+    # collapse into the pending job with the same id
+    if deduplicate:
+        if not job_id:
+            frappe.throw("`job_id` is required to deduplicate delayed jobs")
+        pending_job = get_pending_job(job_id)
+        if pending_job:
+            frappe.logger().info(f"Delayed job {job_id} is already pending, not enqueued again")
+            return pending_job
+
     # Get queue and timeout
     queue_obj = get_queue(queue, is_async=True)
     if timeout is None:
@@ -85,9 +120,12 @@ def enqueue_delayed(
         kwargs=queue_args,
         failure_ttl=frappe.conf.get("rq_job_failure_ttl") or RQ_JOB_FAILURE_TTL,
         result_ttl=frappe.conf.get("rq_results_ttl") or RQ_RESULTS_TTL,
-        job_id=job_id,
+        job_id=create_job_id(job_id) if job_id else None,
     )
 
+    # wake the promoter so the job starts on time
+    notify_promoter(queue_obj.connection)
+
     log_message = f"Enqueued delayed job: {method_name} (delay: {delay}, queue: {queue}, job_id: {job.id})"
     frappe.logger().info(log_message)
 
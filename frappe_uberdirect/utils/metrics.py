@@ -0,0 +1,139 @@
+"""Lightweight counters and histograms for the Uber Direct integration.
+
+Counters are aggregated in Redis hashes, one hash per metric and one field
+per label set, so every increment is a single ``HINCRBY``. Histograms keep
+one field per label set and bucket plus a count and a sum, written in one
+pipelined round trip per observation. Every metric is declared in
+``METRICS`` so it can be exported without scanning Redis.
+"""
+
+import time
+
+import frappe
+
+COUNTER = "counter"
+HISTOGRAM = "histogram"
+
+# every recorded metric with its type and description
+METRICS = {
+    "quote_cache": (COUNTER, "Quote cache lookups by result"),
+    "quote_admission": (COUNTER, "Quote requests admitted or throttled by the rate limiter"),
+    "circuit_breaker_transitions": (COUNTER, "Circuit breaker state changes by endpoint"),
+    "delivery_transitions": (COUNTER, "Delivery status transitions applied or dropped as stale"),
+    "webhook_duplicates": (COUNTER, "Redelivered webhooks dropped by kind"),
+    "webhook_stream": (COUNTER, "Webhook events published, applied and dead-lettered by the stream worker"),
+    "webhook_coalescing": (COUNTER, "Webhook events received and applied by the coalescer"),
+    "delivery_trigger": (COUNTER, "Delivery creations started by the Sales Invoice trigger"),
+    "reconcile_scanned": (COUNTER, "Deliveries scanned by the reconciliation job"),
+    "reconcile_matched": (COUNTER, "Scanned deliveries found locally"),
+    "reconcile_missing": (COUNTER, "Scanned deliveries missing locally"),
+    "reconcile_drifted": (COUNTER, "Scanned deliveries corrected by the reconciliation job"),
+    "uber_request_duration_seconds": (HISTOGRAM, "Duration of Uber Direct API calls by endpoint and status"),
+    "webhook_apply_lag_seconds": (HISTOGRAM, "Time from webhook receipt to the event being applied, by kind"),
+}
+
+# histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+def _get_metric_key(metric: str) -> str:
+    return frappe.cache().make_key(f"uberdirect_metrics:{metric}")
+
+
+def _prepare_label_key(labels: dict) -> str:
+    """Serialize labels into a stable hash field, e.g. ``result=hit,scope=ip``."""
+    return ",".join(f"{key}={labels[key]}" for key in sorted(labels))
+
+
+def _parse_label_key(label_key: str) -> dict:
+    if not label_key:
+        return {}
+    return dict(pair.split("=", 1) for pair in label_key.split(","))
+
+
+def increment(metric: str, amount: int = 1, **labels) -> None:
+    """Increment a counter.
+
+    Example:
+        ```python
+        increment("quote_cache", result="hit")
+        ```
+    """
+    try:
+        frappe.cache().hincrby(_get_metric_key(metric), _prepare_label_key(labels), amount)
+    except Exception as e:
+        # metrics must never break the request that records them
+        frappe.logger(module="frappe_uberdirect").debug(f"Failed to record metric {metric}: {e!s}")
+
+
+def observe(metric: str, value: float, buckets: tuple = DEFAULT_BUCKETS, **labels) -> None:
+    """Record an observation of a histogram.
+
+    Only the smallest bucket holding the value is incremented, buckets are
+    made cumulative when read.
+
+    Example:
+        ```python
+        observe("uber_request_duration_seconds", 0.42, endpoint="create_quote", status=200)
+        ```
+    """
+    label_key = _prepare_label_key(labels)
+    bucket = next((bound for bound in buckets if value <= bound), "+Inf")
+    try:
+        cache = frappe.cache()
+        key = _get_metric_key(metric)
+        with cache.pipeline(transaction=False) as pipe:
+            pipe.hincrby(key, f"{label_key}|le={bucket}", 1)
+            pipe.hincrby(key, f"{label_key}|count", 1)
+            pipe.hincrbyfloat(key, f"{label_key}|sum", value)
+            pipe.execute()
+    except Exception as e:
+        frappe.logger(module="frappe_uberdirect").debug(f"Failed to record metric {metric}: {e!s}")
+
+
+def observe_since(metric: str, started_at: float | None, **labels) -> None:
+    """Record the seconds elapsed since the unix time ``started_at``, if known."""
+
+    if started_at:
+        observe(metric, max(time.time() - float(started_at), 0), **labels)
+
+
+def get_counters(metric: str) -> list[tuple[dict, int]]:
+    """Get every label set of a counter with its value."""
+
+    # bypass the pickling hgetall of Frappe's RedisWrapper, counters are plain integers
+    raw = frappe.cache().execute_command("HGETALL", _get_metric_key(metric)) or {}
+    return [(_parse_label_key(_decode(label_key)), int(value)) for label_key, value in raw.items()]
+
+
+def get_histograms(metric: str, buckets: tuple = DEFAULT_BUCKETS) -> list[dict]:
+    """Get every label set of a histogram with its cumulative buckets, count and sum."""
+
+    raw = frappe.cache().execute_command("HGETALL", _get_metric_key(metric)) or {}
+
+    series = {}
+    for field, value in raw.items():
+        label_key, part = _decode(field).rsplit("|", 1)
+        entry = series.setdefault(label_key, {"buckets": {}, "count": 0, "sum": 0.0})
+        if part == "count":
+            entry["count"] = int(value)
+        elif part == "sum":
+            entry["sum"] = float(value)
+        else:
+            entry["buckets"][part.removeprefix("le=")] = int(value)
+
+    histograms = []
+    for label_key, entry in series.items():
+        cumulative, total = {}, 0
+        for bound in (*(str(bound) for bound in buckets), "+Inf"):
+            total += entry["buckets"].get(bound, 0)
+            cumulative[bound] = total
+        histograms.append(
+            {"labels": _parse_label_key(label_key), "buckets": cumulative, "count": entry["count"], "sum": entry["sum"]}
+        )
+
+    return histograms
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
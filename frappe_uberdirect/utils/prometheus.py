@@ -0,0 +1,141 @@
+"""Prometheus text exposition of the Uber Direct metrics.
+
+Renders the counters and histograms of ``utils.metrics`` together with
+gauges read at scrape time: the depth and oldest job age of the background
+queues and the delayed job promoter's backlog and lag.
+"""
+
+import time
+
+import frappe
+from frappe.utils.background_jobs import get_queue, get_redis_conn
+from rq.utils import utcparse
+
+from .metrics import COUNTER, HISTOGRAM, METRICS, get_counters, get_histograms
+from .promoter import get_promoter_stats
+
+PREFIX = "uberdirect"
+
+# queues whose depth and oldest job age are exported
+MONITORED_QUEUES = ("short", "long")
+
+
+def render_metrics() -> str:
+    """Render every metric in the Prometheus text format."""
+
+    lines = []
+    for metric, (metric_type, description) in METRICS.items():
+        if metric_type == COUNTER:
+            lines.extend(_render_counter(metric, description))
+        elif metric_type == HISTOGRAM:
+            lines.extend(_render_histogram(metric, description))
+
+    lines.extend(_render_queues())
+    lines.extend(_render_promoter())
+    return "\n".join(lines) + "\n"
+
+
+def _render_counter(metric: str, description: str) -> list[str]:
+    name = f"{PREFIX}_{metric}_total"
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+    for labels, value in get_counters(metric):
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    return lines
+
+
+def _render_histogram(metric: str, description: str) -> list[str]:
+    name = f"{PREFIX}_{metric}"
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+    for histogram in get_histograms(metric):
+        labels = histogram["labels"]
+        for bound, value in histogram["buckets"].items():
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {value}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']}")
+    return lines
+
+
+def _render_queues() -> list[str]:
+    """Render the depth and oldest job age of the monitored queues."""
+
+    depth = f"{PREFIX}_queue_depth"
+    age = f"{PREFIX}_queue_oldest_job_age_seconds"
+    lines = [
+        f"# HELP {depth} Jobs waiting in the background queue",
+        f"# TYPE {depth} gauge",
+    ]
+    ages = [
+        f"# HELP {age} Age of the oldest job waiting in the background queue",
+        f"# TYPE {age} gauge",
+    ]
+
+    now = time.time()
+    for queue_type in MONITORED_QUEUES:
+        queue = get_queue(queue_type)
+        labels = _format_labels({"queue": queue_type})
+        lines.append(f"{depth}{labels} {queue.count}")
+
+        # jobs are pushed to the tail, the head is the oldest
+        oldest_age = 0.0
+        job_id = queue.connection.lindex(queue.key, 0)
+        if job_id:
+            enqueued_at = queue.connection.hget(queue.job_class.key_for(_decode(job_id)), "enqueued_at")
+            if enqueued_at:
+                oldest_age = max(now - utcparse(_decode(enqueued_at)).timestamp(), 0)
+        ages.append(f"{age}{labels} {round(oldest_age, 3)}")
+
+    return lines + ages
+
+
+def _render_promoter() -> list[str]:
+    """Render the delayed job promoter's backlog, lag and heartbeat age."""
+
+    stats = get_promoter_stats(get_redis_conn())
+    backlog = f"{PREFIX}_scheduled_backlog"
+    lag = f"{PREFIX}_promoter_last_lag_seconds"
+    promoted = f"{PREFIX}_promoter_promoted_total"
+    heartbeat = f"{PREFIX}_promoter_heartbeat_age_seconds"
+
+    lines = [
+        f"# HELP {backlog} Delayed jobs waiting in the scheduled registry",
+        f"# TYPE {backlog} gauge",
+        f"# HELP {lag} Lag of the latest promotion of delayed jobs",
+        f"# TYPE {lag} gauge",
+        f"# HELP {promoted} Delayed jobs promoted by the promoter",
+        f"# TYPE {promoted} counter",
+    ]
+    for queue_type, queue_stats in stats["queues"].items():
+        labels = _format_labels({"queue": queue_type})
+        if "backlog" in queue_stats:
+            lines.append(f"{backlog}{labels} {int(queue_stats['backlog'])}")
+        if "last_lag_ms" in queue_stats:
+            lines.append(f"{lag}{labels} {queue_stats['last_lag_ms'] / 1000}")
+        if "promoted" in queue_stats:
+            lines.append(f"{promoted}{labels} {int(queue_stats['promoted'])}")
+
+    if stats["heartbeat"]:
+        lines.extend(
+            [
+                f"# HELP {heartbeat} Seconds since the promoter last ran",
+                f"# TYPE {heartbeat} gauge",
+                f"{heartbeat} {round(time.time() - stats['heartbeat'], 3)}",
+            ]
+        )
+
+    return lines
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+
+    pairs = (f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
@@ -0,0 +1,167 @@
+"""Low-latency promoter for delayed RQ jobs.
+
+``process_scheduled_jobs`` only runs on the Frappe ``all`` scheduler event, so
+a delayed job can start up to a full scheduler interval late. The promoter is
+an optional long-running process that sleeps until the earliest due job in
+the scheduled registries and is woken early by ``enqueue_delayed`` whenever a
+new job is scheduled.
+
+Run it next to the workers:
+
+    bench --site <site> uberdirect-promoter
+"""
+
+import signal
+import time
+
+import frappe
+from frappe.utils.background_jobs import generate_qname, get_queue, get_queues_timeout, get_redis_conn
+from rq.registry import ScheduledJobRegistry
+
+from .scheduler import promote_due_jobs
+
+# upper bound on a single sleep, for jobs scheduled without a wake-up; the
+# promoter otherwise sleeps until the earliest due job or a wake-up
+DEFAULT_MAX_SLEEP = 60.0
+
+# pause after an error, in seconds
+ERROR_BACKOFF = 1.0
+
+
+def _get_wake_key() -> str:
+    return f"{generate_qname('uberdirect_promoter')}:wake"
+
+
+def _get_stats_key() -> str:
+    return f"{generate_qname('uberdirect_promoter')}:stats"
+
+
+def notify_promoter(redis_conn=None) -> None:
+    """Wake the promoter so it re-reads the earliest due timestamp."""
+
+    redis_conn = redis_conn or get_redis_conn()
+    with redis_conn.pipeline() as pipe:
+        pipe.lpush(_get_wake_key(), 1)
+        pipe.ltrim(_get_wake_key(), 0, 0)
+        pipe.execute()
+
+
+def get_promoter_stats(redis_conn=None) -> dict:
+    """Get promotion lag and scheduled backlog per queue.
+
+    Returns:
+        dict: ``{"heartbeat": <unix time>, "queues": {<queue>: {"backlog": .., ...}}}``
+    """
+    redis_conn = redis_conn or get_redis_conn()
+    raw = redis_conn.hgetall(_get_stats_key())
+
+    stats = {"heartbeat": None, "queues": {}}
+    for field, value in raw.items():
+        field = field.decode() if isinstance(field, bytes) else field
+        value = float(value)
+        if field == "heartbeat":
+            stats["heartbeat"] = value
+            continue
+
+        queue_type, metric = field.split(":", 1)
+        stats["queues"].setdefault(queue_type, {})[metric] = value
+
+    return stats
+
+
+class DelayedJobPromoter:
+    """Promote scheduled jobs as soon as they are due."""
+
+    def __init__(self, max_sleep: float = DEFAULT_MAX_SLEEP, redis_conn=None):
+        self.max_sleep = max_sleep
+        self.redis_conn = redis_conn or get_redis_conn()
+        self.queues = {queue_type: get_queue(queue_type, is_async=True) for queue_type in get_queues_timeout()}
+        self.registry_keys = {
+            queue_type: ScheduledJobRegistry(queue=queue, connection=self.redis_conn).key
+            for queue_type, queue in self.queues.items()
+        }
+        self.running = False
+
+    def run(self) -> None:
+        """Promote due jobs until stopped with SIGINT or SIGTERM."""
+
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        frappe.logger().info(f"Delayed job promoter started for queues {list(self.queues)}")
+        while self.running:
+            try:
+                self.promote()
+                self.wait()
+            except Exception as e:
+                frappe.logger().error(f"Error in delayed job promoter: {e!s}", exc_info=True)
+                time.sleep(ERROR_BACKOFF)
+
+        frappe.logger().info("Delayed job promoter stopped")
+
+    def stop(self, *args) -> None:
+        self.running = False
+
+    def promote(self) -> None:
+        """Promote due jobs of every queue and record lag and backlog."""
+
+        now = time.time()
+        with self.redis_conn.pipeline() as pipe:
+            for queue_type, queue in self.queues.items():
+                promoted = promote_due_jobs(queue, redis_conn=self.redis_conn, now=now)
+                self._record_promotion(pipe, queue_type, promoted)
+            for queue_type, registry_key in self.registry_keys.items():
+                pipe.zcard(registry_key)
+            backlogs = pipe.execute()[-len(self.registry_keys) :]
+
+        with self.redis_conn.pipeline() as pipe:
+            for queue_type, backlog in zip(self.registry_keys, backlogs, strict=True):
+                pipe.hset(_get_stats_key(), f"{queue_type}:backlog", backlog)
+            pipe.hset(_get_stats_key(), "heartbeat", now)
+            pipe.execute()
+
+    def wait(self) -> None:
+        """Sleep until the earliest due job, or until woken by a new delayed job."""
+
+        with self.redis_conn.pipeline() as pipe:
+            for registry_key in self.registry_keys.values():
+                pipe.zrange(registry_key, 0, 0, withscores=True)
+            earliest = [entry[0][1] for entry in pipe.execute() if entry]
+
+        timeout = self.max_sleep
+        if earliest:
+            timeout = min(timeout, max(min(earliest) - time.time(), 0))
+
+        if timeout <= 0:
+            return
+
+        # a BLPOP timeout truncated to 0 would block until the next wake-up, so
+        # sub-second waits sleep instead and longer ones block for whole seconds
+        if timeout < 1:
+            time.sleep(timeout)
+            return
+
+        self.redis_conn.blpop(_get_wake_key(), timeout=int(timeout))
+
+    def _record_promotion(self, pipe, queue_type: str, promoted: list) -> None:
+        """Queue the promotion counters and lag for ``queue_type`` on ``pipe``."""
+
+        if not promoted:
+            return
+
+        promoted_at = time.time()
+        max_lag_ms = max((promoted_at - scheduled_at) * 1000 for _, scheduled_at in promoted)
+        pipe.hincrby(_get_stats_key(), f"{queue_type}:promoted", len(promoted))
+        pipe.hset(_get_stats_key(), f"{queue_type}:last_lag_ms", round(max_lag_ms, 1))
+
+        frappe.logger().info(
+            f"Promoted {len(promoted)} delayed jobs to queue {queue_type} (max lag {max_lag_ms:.0f} ms)"
+        )
+
+
+def run_promoter(max_sleep: float | None = None) -> None:
+    """Run the delayed job promoter in the foreground."""
+
+    max_sleep = max_sleep or frappe.conf.get("uberdirect_promoter_max_sleep") or DEFAULT_MAX_SLEEP
+    DelayedJobPromoter(max_sleep=float(max_sleep)).run()
@@ -0,0 +1,66 @@
+"""Redis-backed token bucket rate limiting.
+
+Each scope (e.g. per IP, per session, global) has its own bucket. A request is
+admitted only if every bucket it belongs to has a token; the check and the
+consumption happen atomically in a Lua script.
+"""
+
+import time
+
+import frappe
+
+# Refill each bucket lazily and consume one token from all of them, or none if
+# any bucket is empty. Returns the 1-based index of the empty bucket and the
+# seconds until it has a token again, or 0.
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local tokens = {}
+for i = 1, #KEYS do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local available = tonumber(state[1]) or burst
+    local updated_at = tonumber(state[2]) or now
+    available = math.min(burst, available + math.max(0, now - updated_at) * rate)
+    if available < 1 then
+        return {i, math.ceil((1 - available) / rate)}
+    end
+    tokens[i] = available
+end
+for i = 1, #KEYS do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', KEYS[i], 'tokens', tokens[i] - 1, 'ts', now)
+    redis.call('EXPIRE', KEYS[i], math.ceil(burst / rate) + 1)
+end
+return 0
+"""
+
+
+def consume_tokens(name: str, buckets: list[tuple[str, str, dict]]) -> tuple[str, int] | None:
+    """Take one token from every bucket.
+
+    Args:
+        name: Name of the limited resource, e.g. ``create_quote``
+        buckets: ``(scope, identifier, {"rate": <tokens/second>, "burst": <size>})``
+            for each bucket the request belongs to
+
+    Returns:
+        tuple[str, int] | None: The scope whose bucket is exhausted and the seconds
+            until it refills a token, or None if admitted
+    """
+    if not buckets:
+        return None
+
+    cache = frappe.cache()
+    keys = [cache.make_key(f"uberdirect_rate_limit:{name}:{scope}:{identifier}") for scope, identifier, _ in buckets]
+    args = [time.time()]
+    for _, _, limit in buckets:
+        args.extend([float(limit["rate"]), float(limit["burst"])])
+
+    exhausted = cache.register_script(TOKEN_BUCKET_SCRIPT)(keys=keys, args=args)
+    if not exhausted:
+        return None
+
+    index, retry_after = exhausted
+    return buckets[int(index) - 1][0], max(int(retry_after), 1)
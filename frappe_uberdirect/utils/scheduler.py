@@ -1,10 +1,86 @@
 """Scheduler tasks for processing delayed jobs."""
 
+import time
 from datetime import datetime, timezone
 
 import frappe
-from frappe.utils.background_jobs import get_queue, get_redis_conn, generate_qname
+from frappe.utils.background_jobs import get_queue, get_queues_timeout, get_redis_conn, generate_qname
 from rq.registry import ScheduledJobRegistry
+from rq.utils import utcformat
+
+# number of due jobs claimed per round trip
+PROMOTE_BATCH_SIZE = 500
+
+# Select due jobs by score and move them from the scheduled registry into the
+# queue in one atomic step, as ``Queue.enqueue_job`` would: mark the job
+# queued and push its id. A job is never left out of both the registry and the
+# queue, and several scheduler processes can promote concurrently without
+# enqueuing twice. Jobs whose data expired in the meantime are dropped.
+PROMOTE_DUE_JOBS_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, ARGV[2])
+local claimed = 0
+local promoted = {}
+for i = 1, #due, 2 do
+    local job_id = due[i]
+    claimed = claimed + 1
+    redis.call('ZREM', KEYS[1], job_id)
+
+    local job_key = ARGV[3] .. job_id
+    if redis.call('EXISTS', job_key) == 1 then
+        redis.call('HSET', job_key, 'status', 'queued', 'origin', ARGV[4], 'enqueued_at', ARGV[5])
+        redis.call('RPUSH', KEYS[2], job_id)
+        promoted[#promoted + 1] = job_id
+        promoted[#promoted + 1] = due[i + 1]
+    end
+end
+if #promoted > 0 then
+    redis.call('SADD', KEYS[3], KEYS[2])
+end
+return {claimed, promoted}
+"""
+
+
+def promote_due_jobs(queue, redis_conn=None, now: float | None = None, batch_size: int = PROMOTE_BATCH_SIZE):
+    """
+    Move every due job of a queue's scheduled registry into the queue.
+
+    Due jobs are claimed and enqueued in bulk by a single Lua script per batch.
+
+    Args:
+        queue: RQ queue whose scheduled registry is promoted
+        redis_conn: Redis connection, defaults to the queue connection
+        now: Unix timestamp used as the due cutoff, defaults to the current time
+        batch_size: Number of jobs claimed per round trip
+
+    Returns:
+        list[tuple[str, float]]: ``(job_id, scheduled_timestamp)`` of each promoted job
+    """
+    redis_conn = redis_conn or queue.connection
+    registry = ScheduledJobRegistry(queue=queue, connection=redis_conn)
+    promote_batch = redis_conn.register_script(PROMOTE_DUE_JOBS_SCRIPT)
+    cutoff = now if now is not None else time.time()
+
+    promoted = []
+    while True:
+        claimed, batch = promote_batch(
+            keys=[registry.key, queue.key, queue.redis_queues_keys],
+            args=[
+                cutoff,
+                batch_size,
+                queue.job_class.redis_job_namespace_prefix,
+                queue.name,
+                utcformat(datetime.now(timezone.utc)),
+            ],
+        )
+
+        for job_id, score in zip(batch[::2], batch[1::2], strict=True):
+            job_id = job_id.decode() if isinstance(job_id, bytes) else job_id
+            promoted.append((job_id, float(score)))
+
+        if claimed < batch_size:
+            break
+
+    return promoted
 
 
 def process_scheduled_jobs():
@@ -13,85 +89,22 @@ def process_scheduled_jobs():
     This is needed because Frappe disables RQ's scheduler.
     Runs every minute via Frappe scheduler.
     """
-    # Log that scheduler is running
-    print("process_scheduled_jobs: Scheduler task started")
-    frappe.logger().info("process_scheduled_jobs: Scheduler task started")
-
     try:
         redis_conn = get_redis_conn()
-
-        # Get all queues using the same format Frappe uses
-        from frappe.utils.background_jobs import get_queues_timeout
-
         processed_count = 0
 
         for queue_type in get_queues_timeout().keys():
             try:
                 # Use the same queue generation as Frappe
                 queue = get_queue(queue_type, is_async=True)
-                queue_name = generate_qname(queue_type)
-
-                # Create registry for this queue
-                registry = ScheduledJobRegistry(queue=queue, connection=redis_conn)
-
-                # Get all scheduled jobs
-                job_ids = registry.get_job_ids()
-
-                if not job_ids:
+                promoted = promote_due_jobs(queue, redis_conn=redis_conn)
+                if not promoted:
                     continue
 
-                print(f"Found {len(job_ids)} scheduled jobs in queue {queue_name}")
+                processed_count += len(promoted)
                 frappe.logger().info(
-                    f"Found {len(job_ids)} scheduled jobs in queue {queue_name}"
+                    f"Moved {len(promoted)} scheduled jobs to queue {generate_qname(queue_type)}"
                 )
-
-                for job_id in job_ids:
-                    try:
-                        # Get scheduled timestamp from registry's sorted set
-                        # RQ stores scheduled jobs in a sorted set where score = timestamp
-                        scheduled_timestamp = redis_conn.zscore(registry.key, job_id)
-
-                        if scheduled_timestamp is None:
-                            # If no scheduled time, move it immediately
-                            job = queue.job_class.fetch(job_id, connection=redis_conn)
-                            registry.remove(job_id)
-                            queue.enqueue_job(job)
-                            processed_count += 1
-                            frappe.logger().info(
-                                f"Moved scheduled job {job_id} to queue (no scheduled time)"
-                            )
-                            continue
-
-                        # Convert timestamp to datetime
-                        scheduled_at = datetime.fromtimestamp(
-                            scheduled_timestamp, tz=timezone.utc
-                        )
-                        now = datetime.now(timezone.utc)
-
-                        print(
-                            f"Job {job_id}: scheduled_at={scheduled_at}, now={now}, ready={scheduled_at <= now}"
-                        )
-
-                        if scheduled_at <= now:
-                            # Move job from scheduled registry to queue
-                            job = queue.job_class.fetch(job_id, connection=redis_conn)
-                            registry.remove(job_id)
-                            queue.enqueue_job(job)
-                            processed_count += 1
-                            print(f"Moved scheduled job {job_id} to queue")
-                            frappe.logger().info(
-                                f"Moved scheduled job {job_id} to queue {queue_name} "
-                                f"(was scheduled for {scheduled_at}, now is {now})"
-                            )
-                        else:
-                            print(
-                                f"Job {job_id} not ready yet (scheduled for {scheduled_at}, now is {now})"
-                            )
-                    except Exception as e:
-                        frappe.logger().error(
-                            f"Error processing scheduled job {job_id}: {str(e)}",
-                            exc_info=True,
-                        )
             except Exception as e:
                 frappe.logger().error(
                     f"Error processing scheduled jobs for queue {queue_type}: {str(e)}",
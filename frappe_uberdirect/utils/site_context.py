@@ -0,0 +1,50 @@
+"""Helper to run Frappe code outside the request or job thread."""
+
+from contextlib import contextmanager
+
+import frappe
+
+
+@contextmanager
+def site_context(site: str, sites_path: str, user: str | None = None, connect: bool = True):
+    """
+    Initialize a Frappe site context in the current thread.
+
+    ``frappe.local`` is thread-local, so worker threads started from a request
+    or background job have no site, config or DB connection. The changes are
+    committed when the block succeeds and rolled back otherwise.
+
+    Args:
+        site: Site name, usually ``frappe.local.site`` of the parent thread
+        sites_path: Sites path, usually ``frappe.local.sites_path`` of the parent thread
+        user: User to run as
+        connect: Open a DB connection; not needed for config and Redis only work
+
+    Example:
+        ```python
+        site, sites_path = frappe.local.site, frappe.local.sites_path
+
+        def work():
+            with site_context(site, sites_path):
+                ...
+
+        threading.Thread(target=work).start()
+        ```
+    """
+    frappe.init(site=site, sites_path=sites_path)
+    try:
+        if connect:
+            frappe.connect()
+            if user:
+                frappe.set_user(user)
+
+        yield
+
+        if connect:
+            frappe.db.commit()
+    except Exception:
+        if connect and frappe.db:
+            frappe.db.rollback()
+        raise
+    finally:
+        frappe.destroy()
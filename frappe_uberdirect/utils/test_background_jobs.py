@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from frappe.tests import IntegrationTestCase
+from frappe.utils.background_jobs import create_job_id, get_queue
+
+from frappe_uberdirect.utils.background_jobs import enqueue_delayed, get_pending_job
+from frappe_uberdirect.utils.promoter import DelayedJobPromoter
+
+JOB_ID = "uberdirect_test_delayed_job"
+
+
+class IntegrationTestEnqueueDelayed(IntegrationTestCase):
+    def setUp(self):
+        self.addCleanup(self._delete_job)
+
+    def _delete_job(self):
+        job = get_pending_job(JOB_ID)
+        if job:
+            job.delete()
+
+    def test_job_id_is_site_prefixed_like_frappe_enqueue(self):
+        job = enqueue_delayed("frappe.ping", delay=timedelta(minutes=10), queue="short", job_id=JOB_ID)
+
+        self.assertEqual(job.id, create_job_id(JOB_ID))
+        self.assertNotEqual(job.id, JOB_ID)
+
+    def test_get_pending_job_finds_the_prefixed_job(self):
+        job = enqueue_delayed("frappe.ping", delay=timedelta(minutes=10), queue="short", job_id=JOB_ID)
+
+        self.assertEqual(get_pending_job(JOB_ID).id, job.id)
+
+        # deduplication looks the job up by the same unprefixed id
+        duplicate = enqueue_delayed(
+            "frappe.ping", delay=timedelta(minutes=10), queue="short", job_id=JOB_ID, deduplicate=True
+        )
+        self.assertEqual(duplicate.id, job.id)
+
+    def test_promoter_promotes_the_prefixed_job(self):
+        job = enqueue_delayed("frappe.ping", delay=timedelta(seconds=0), queue="short", job_id=JOB_ID)
+
+        DelayedJobPromoter().promote()
+
+        self.assertIn(job.id, get_queue("short").get_job_ids())
+        self.assertEqual(get_pending_job(JOB_ID).get_status(), "queued")
@@ -0,0 +1,52 @@
+import time
+from unittest.mock import MagicMock, patch
+
+from frappe.tests import UnitTestCase
+
+from frappe_uberdirect.utils.promoter import DelayedJobPromoter
+
+
+def _make_promoter(earliest: float | None, max_sleep: float = 60.0) -> DelayedJobPromoter:
+    """Build a promoter whose only scheduled job is due at ``earliest``."""
+
+    promoter = DelayedJobPromoter.__new__(DelayedJobPromoter)
+    promoter.max_sleep = max_sleep
+    promoter.registry_keys = {"short": "rq:scheduled:short"}
+    promoter.redis_conn = MagicMock()
+
+    pipe = promoter.redis_conn.pipeline.return_value.__enter__.return_value
+    pipe.execute.return_value = [[(b"job", earliest)]] if earliest is not None else [[]]
+    return promoter
+
+
+@patch("frappe_uberdirect.utils.promoter._get_wake_key", return_value="wake")
+class UnitTestDelayedJobPromoter(UnitTestCase):
+    def test_sub_second_wait_never_blocks_forever(self, _):
+        promoter = _make_promoter(time.time() + 0.4)
+
+        with patch("frappe_uberdirect.utils.promoter.time.sleep") as sleep:
+            promoter.wait()
+
+        promoter.redis_conn.blpop.assert_not_called()
+        self.assertGreater(sleep.call_args.args[0], 0)
+        self.assertLess(sleep.call_args.args[0], 1)
+
+    def test_wait_blocks_whole_seconds_until_the_next_due_job(self, _):
+        promoter = _make_promoter(time.time() + 2.5)
+        promoter.wait()
+
+        timeout = promoter.redis_conn.blpop.call_args.kwargs["timeout"]
+        self.assertIsInstance(timeout, int)
+        self.assertIn(timeout, (1, 2))
+
+    def test_wait_is_capped_without_due_jobs(self, _):
+        promoter = _make_promoter(None, max_sleep=60.0)
+        promoter.wait()
+
+        self.assertEqual(promoter.redis_conn.blpop.call_args.kwargs["timeout"], 60)
+
+    def test_overdue_job_does_not_wait(self, _):
+        promoter = _make_promoter(time.time() - 5)
+        promoter.wait()
+
+        promoter.redis_conn.blpop.assert_not_called()